@@ -34,9 +34,9 @@ from tlz import first, groupby, merge, partition_all, valmap
 import dask
 from dask.base import collections_to_dsk, tokenize
 from dask.core import flatten, validate_key
-from dask.highlevelgraph import HighLevelGraph
+from dask.highlevelgraph import HighLevelGraph, MaterializedLayer
 from dask.optimization import SubgraphCallable
-from dask.typing import NoDefault, no_default
+from dask.typing import Key, NoDefault, no_default
 from dask.utils import (
     apply,
     ensure_dict,
@@ -50,14 +50,13 @@ from dask.utils import (
 from dask.widgets import get_template
 
 from distributed.core import OKMessage
-from distributed.protocol.serialize import _is_dumpable
+from distributed.protocol.serialize import _is_dumpable, serialize_and_split
 from distributed.utils import Deadline, wait_for
 
 try:
     from dask.delayed import single_key
 except ImportError:
     single_key = first
-from tornado import gen
 from tornado.ioloop import IOLoop
 
 import distributed.utils
@@ -86,7 +85,8 @@ from distributed.diagnostics.plugin import (
 )
 from distributed.metrics import time
 from distributed.objects import HasWhat, SchedulerInfo, WhoHas
-from distributed.protocol import to_serialize
+from distributed.protocol import Serialized, to_serialize
+from distributed.protocol.compression import get_compression_settings, maybe_compress
 from distributed.protocol.pickle import dumps, loads
 from distributed.publish import Datasets
 from distributed.pubsub import PubSubClientExtension
@@ -105,15 +105,18 @@ from distributed.utils import (
     is_python_shutting_down,
     log_errors,
     nbytes,
+    offload,
     sync,
     thread_state,
 )
 from distributed.utils_comm import (
     WrappedKey,
     gather_from_workers,
+    gather_from_workers_iter,
     pack_data,
     retry_operation,
     scatter_to_workers,
+    scatter_to_workers_iter,
     unpack_remotedata,
 )
 from distributed.worker import get_client, get_worker, secede
@@ -127,6 +130,13 @@ _global_client_index = [0]
 
 _current_client: ContextVar[Client | None] = ContextVar("_current_client", default=None)
 
+#: Graphs submitted within ``Client.submit_batch`` blocks and not sent yet, by client
+#: ID. This is a context variable, so that only the thread or task that opened a block
+#: batches its submissions.
+_submit_batches: ContextVar[dict[str, list[dict[str, Any]]]] = ContextVar(
+    "_submit_batches", default={}
+)
+
 DEFAULT_EXTENSIONS = {
     "pubsub": PubSubClientExtension,
 }
@@ -410,7 +420,8 @@ class Future(WrappedKey):
                 logger.exception("Error in callback %s of %s:", fn, fut)
 
         self.client.loop.add_callback(
-            done_callback, self, partial(cls._cb_executor.submit, execute_callback)
+            self._state.add_done_callback,
+            partial(cls._cb_executor.submit, execute_callback, self),
         )
 
     def cancel(self, **kwargs):
@@ -500,7 +511,7 @@ class Future(WrappedKey):
         if not self._cleared and self.client.generation == self._generation:
             self._cleared = True
             try:
-                self.client.loop.add_callback(self.client._dec_ref, self.key)
+                self.client._dec_ref_soon(self.key)
             except TypeError:  # pragma: no cover
                 pass  # Shutting down, add_callback may be None
 
@@ -551,10 +562,11 @@ class FutureState:
     This is shared between all Futures with the same key and client.
     """
 
-    __slots__ = ("_event", "status", "type", "exception", "traceback")
+    __slots__ = ("_event", "_callbacks", "status", "type", "exception", "traceback")
 
     def __init__(self):
         self._event = None
+        self._callbacks = None
         self.status = "pending"
         self.type = None
 
@@ -567,11 +579,44 @@ class FutureState:
             event = self._event = asyncio.Event()
         return event
 
+    def add_done_callback(self, callback):
+        """Call ``callback()`` as soon as the event is set, or right away if it
+        already is.
+
+        Unlike awaiting :meth:`wait`, this doesn't cost a coroutine per waiter, so
+        it scales to waiting on millions of futures. Callbacks are called once, on
+        the event loop, and must not block.
+        """
+        if self.done():
+            callback()
+        elif self._callbacks is None:
+            self._callbacks = [callback]
+        else:
+            self._callbacks.append(callback)
+
+    def remove_done_callback(self, callback):
+        """Remove a callback added with :meth:`add_done_callback`, if it wasn't
+        called yet"""
+        if self._callbacks:
+            with suppress(ValueError):
+                self._callbacks.remove(callback)
+
+    def _run_callbacks(self):
+        callbacks = self._callbacks
+        if callbacks:
+            self._callbacks = None
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    logger.exception("Error in callback %s", callback)
+
     def cancel(self):
         """Cancels the operation"""
         self.status = "cancelled"
         self.exception = CancelledError()
         self._get_event().set()
+        self._run_callbacks()
 
     def finish(self, type=None):
         """Sets the status to 'finished' and sets the event
@@ -585,6 +630,7 @@ class FutureState:
         self._get_event().set()
         if type is not None:
             self.type = type
+        self._run_callbacks()
 
     def lose(self):
         """Sets the status to 'lost' and clears the event"""
@@ -615,6 +661,7 @@ class FutureState:
         self.exception = exception
         self.traceback = traceback
         self._get_event().set()
+        self._run_callbacks()
 
     def done(self):
         """Returns 'True' if the event is not None and the event is set"""
@@ -641,21 +688,6 @@ class FutureState:
         return f"<{self.__class__.__name__}: {self.status}>"
 
 
-async def done_callback(future, callback):
-    """Coroutine that waits on the future, then calls the callback
-
-    Parameters
-    ----------
-    future : asyncio.Future
-        The future
-    callback : callable
-        The callback
-    """
-    while future.status == "pending":
-        await future._state.wait()
-    callback(future)
-
-
 class AllExit(Exception):
     """Custom exception class to exit All(...) early."""
 
@@ -732,6 +764,17 @@ def _maybe_call_security_loader(address):
     return None
 
 
+def _serialize_for_scatter(x: object, compression: str | None) -> Serialized:
+    """Serialize and compress an object ahead of sending it, like the comms would"""
+    header, frames = serialize_and_split(x, on_error="raise")
+    codecs = list(header.get("compression") or [None] * len(frames))
+    for i, frame in enumerate(frames):
+        if codecs[i] is None:
+            codecs[i], frames[i] = maybe_compress(frame, compression=compression)
+    header["compression"] = tuple(codecs)
+    return Serialized(header, frames)
+
+
 class VersionsDict(TypedDict):
     scheduler: dict[str, dict[str, Any]]
     workers: dict[str, dict[str, dict[str, Any]]]
@@ -888,6 +931,14 @@ class Client(SyncMethodMixin):
         # or any bulk operation that needs to ensure the set of futures doesn't
         # change during operation.
         self._refcount_lock = threading.RLock()
+        # Keys of released futures whose refcount has yet to be decremented on the
+        # event loop, and keys released since the last message to the scheduler
+        self._pending_dec_refs: list[Key] = []
+        self._released_keys: list[Key] = []
+        # Keys of impure tasks submitted within a ``Client.submit_batch`` block are
+        # made unique with a counter, which is much cheaper than a UUID per task
+        self._impure_key_prefix = str(uuid.uuid4())
+        self._impure_key_counter = itertools.count()
         self.datasets = Datasets(self)
         self._serializers = serializers
         if deserializers is None:
@@ -1240,7 +1291,11 @@ class Client(SyncMethodMixin):
 
     def _send_to_scheduler(self, msg):
         if self.status in ("running", "closing", "connecting", "newly-created"):
-            self.loop.add_callback(self._send_to_scheduler_safe, msg)
+            with self._refcount_lock:
+                # Keys released from now on must reach the scheduler after msg
+                if self._released_keys:
+                    self._released_keys = []
+                self.loop.add_callback(self._send_to_scheduler_safe, msg)
         else:
             raise Exception(
                 "Tried sending message after closing.  Status: %s\n"
@@ -1533,6 +1588,24 @@ class Client(SyncMethodMixin):
                 del self.refcount[key]
                 self._release_key(key)
 
+    def _dec_ref_soon(self, key):
+        """Decrement the refcount of key on the event loop
+
+        Can be called from any thread. All the keys released until the event loop
+        gets to them are processed together.
+        """
+        with self._refcount_lock:
+            self._pending_dec_refs.append(key)
+            if len(self._pending_dec_refs) == 1:
+                self.loop.add_callback(self._flush_dec_refs)
+
+    def _flush_dec_refs(self):
+        with self._refcount_lock:
+            keys = self._pending_dec_refs
+            self._pending_dec_refs = []
+            for key in keys:
+                self._dec_ref(key)
+
     def _release_key(self, key):
         """Release key from distributed memory"""
         logger.debug("Release key %s", key)
@@ -1540,9 +1613,21 @@ class Client(SyncMethodMixin):
         if st is not None:
             st.cancel()
         if self.status != "closed":
-            self._send_to_scheduler(
-                {"op": "client-releases-keys", "keys": [key], "client": self.id}
-            )
+            # Keys released until the next message to the scheduler are sent
+            # together in a single client-releases-keys message
+            with self._refcount_lock:
+                keys = self._released_keys
+                keys.append(key)
+                if len(keys) == 1:
+                    self.loop.add_callback(self._send_released_keys, keys)
+
+    def _send_released_keys(self, keys):
+        with self._refcount_lock:
+            if self._released_keys is keys:
+                self._released_keys = []
+        self._send_to_scheduler_safe(
+            {"op": "client-releases-keys", "keys": keys, "client": self.id}
+        )
 
     @log_errors
     async def _handle_report(self):
@@ -1825,6 +1910,136 @@ class Client(SyncMethodMixin):
         """
         return ClientExecutor(self, **kwargs)
 
+    @contextmanager
+    def submit_batch(self):
+        """Context manager that sends all the tasks submitted within it to the
+        scheduler at once
+
+        By default, every call to :meth:`submit` or :meth:`map` sends its own graph to
+        the scheduler, which has to process them one by one. Within this block, the
+        graphs are instead collected and sent in a single message when the block
+        exits, which is much faster when submitting many small tasks in a loop.
+
+        The futures are returned immediately, but the scheduler only learns about
+        the tasks when the block exits. Only :meth:`submit` and :meth:`map` calls
+        made from the thread, or the asyncio task, that opened the block are
+        batched. Any other graph submitted from there, e.g. by :meth:`get` or
+        :meth:`compute`, and any blocking call on the client, e.g. waiting for a
+        result, first sends the tasks collected so far. Tasks are prioritized in
+        the order they were submitted.
+
+        Examples
+        --------
+        >>> with client.submit_batch():  # doctest: +SKIP
+        ...     futures = [client.submit(inc, i, pure=False) for i in range(100_000)]
+
+        See Also
+        --------
+        Client.submit
+        Client.map
+        """
+        batches = _submit_batches.get()
+        if self.id in batches:
+            # Nested blocks are flushed by the outermost one
+            yield
+            return
+        batch: list[dict[str, Any]] = []
+        token = _submit_batches.set({**batches, self.id: batch})
+        try:
+            yield
+        finally:
+            _submit_batches.reset(token)
+            with self._refcount_lock:
+                if batch:
+                    self._send_submit_batch(batch)
+
+    def _current_submit_batch(self) -> list[dict[str, Any]] | None:
+        """The graphs collected by the :meth:`submit_batch` block opened by the
+        current thread or task, if any
+        """
+        return _submit_batches.get().get(self.id)
+
+    def _flush_submit_batch(self) -> None:
+        """Send the graphs collected so far by the current :meth:`submit_batch`
+        block, e.g. before waiting for any of them
+        """
+        with self._refcount_lock:
+            batch = self._current_submit_batch()
+            if batch:
+                graphs = batch.copy()
+                batch.clear()
+                self._send_submit_batch(graphs)
+
+    def sync(self, func, *args, asynchronous=None, callback_timeout=None, **kwargs):
+        if self._current_submit_batch():
+            # Don't wait for futures that the scheduler doesn't know about yet
+            self._flush_submit_batch()
+        return super().sync(
+            func,
+            *args,
+            asynchronous=asynchronous,
+            callback_timeout=callback_timeout,
+            **kwargs,
+        )
+
+    def _send_submit_batch(self, batch: list[dict[str, Any]]) -> None:
+        """Send the graphs collected by :meth:`submit_batch`
+
+        Consecutive graphs with the same ``fifo_timeout`` are sent as a single
+        graph. Within it, consecutive graphs with the same annotations are merged
+        into the same layer, so that the annotations of each ``submit`` call are
+        preserved.
+        """
+        for _, graphs in itertools.groupby(
+            batch, key=lambda item: parse_timedelta(item["fifo_timeout"])
+        ):
+            self._send_submit_batch_graph(list(graphs))
+
+    def _send_submit_batch_graph(self, batch: list[dict[str, Any]]) -> None:
+        """Send graphs collected by :meth:`submit_batch`, which share the same
+        ``fifo_timeout``, as a single graph
+        """
+        layers: dict[str, MaterializedLayer] = {}
+        keys: list[Key] = []
+        internal_priority: dict[Key, int] = {}
+        actors: list[Key] = []
+        dsk: dict = {}
+        annotations: dict[str, Any] | None = None
+        for item in batch:
+            if item["annotations"] != annotations and dsk:
+                layers[f"submit-batch-{len(layers)}"] = MaterializedLayer(
+                    dsk, annotations=annotations
+                )
+                dsk = {}
+            annotations = item["annotations"]
+            dsk.update(item["dsk"])
+            # Submission order takes precedence over each graph's own ordering
+            offset = len(internal_priority)
+            for k, prio in item["internal_priority"].items():
+                internal_priority[k] = offset + prio
+            keys.extend(item["keys"])
+            if item["actors"] is True:
+                actors.extend(item["keys"])
+            elif item["actors"]:
+                actors.extend(item["actors"])
+        layers[f"submit-batch-{len(layers)}"] = MaterializedLayer(
+            dsk, annotations=annotations
+        )
+        graph = HighLevelGraph(layers, dependencies={name: set() for name in layers})
+        with self._refcount_lock:
+            # Futures released within the block must not be resurrected
+            keys = [k for k in keys if k in self.futures]
+            if not keys:
+                return
+            self._send_graph(
+                graph,
+                keys,
+                internal_priority=internal_priority,
+                fifo_timeout=batch[0]["fifo_timeout"],
+                actors=actors or None,
+                annotations={},
+            )
+
     def submit(
         self,
         func,
@@ -1929,6 +2144,11 @@ class Client(SyncMethodMixin):
         if key is None:
             if pure:
                 key = funcname(func) + "-" + tokenize(func, kwargs, *args)
+            elif self._current_submit_batch() is not None:
+                key = (
+                    f"{funcname(func)}-{self._impure_key_prefix}-"
+                    f"{next(self._impure_key_counter)}"
+                )
             else:
                 key = funcname(func) + "-" + str(uuid.uuid4())
 
@@ -2378,6 +2598,179 @@ class Client(SyncMethodMixin):
                 asynchronous=asynchronous,
             )
 
+    async def _gather_iter(
+        self,
+        futures,
+        errors="raise",
+        max_in_flight_bytes="256 MiB",
+        max_requests_per_worker=2,
+        sink=None,
+    ):
+        futures = futures_of(futures)
+        mismatched_futures = [f for f in futures if f.client is not self]
+        if mismatched_futures:
+            raise ValueError(
+                "Cannot gather Futures created by another client. "
+                f"These are the {len(mismatched_futures)} (out of {len(futures)}) "
+                f"mismatched Futures and their client IDs (this client is {self.id})"
+            )
+        max_in_flight_bytes = parse_bytes(max_in_flight_bytes)
+        pending: dict[Key, list[Future]] = defaultdict(list)
+        for future in futures:
+            pending[future.key].append(future)
+
+        # Completed keys are queued by callbacks, rather than polling every pending
+        # future each time one of them completes
+        ready: list[Key] = []
+        wakeup = asyncio.Event()
+        callbacks = {}
+
+        def track(key):
+            def on_done():
+                ready.append(key)
+                wakeup.set()
+
+            callbacks[key] = on_done
+            pending[key][0]._state.add_done_callback(on_done)
+
+        for key in pending:
+            track(key)
+
+        try:
+            while pending:
+                if not ready:
+                    wakeup.clear()
+                    await wakeup.wait()
+                    continue
+                batch = ready.copy()
+                ready.clear()
+
+                keys = []
+                for key in batch:
+                    if key not in pending:
+                        continue
+                    future = pending[key][0]
+                    if future.status == "finished":
+                        keys.append(key)
+                    elif errors == "raise":
+                        if future.status == "error":
+                            st = future._state
+                            raise st.exception.with_traceback(st.traceback)
+                        raise CancelledError(key)
+                    elif errors == "skip":
+                        del pending[key]
+                    else:  # pragma: no cover
+                        raise ValueError("Bad value, `errors=%s`" % errors)
+                if not keys:
+                    continue
+
+                who_has = await retry_operation(self.scheduler.who_has, keys=keys)
+                nbytes = await retry_operation(
+                    self.scheduler.nbytes, keys=keys, summary=False
+                )
+                lost = []
+                batches = gather_from_workers_iter(
+                    who_has,
+                    nbytes,
+                    rpc=self.rpc,
+                    max_in_flight_bytes=max_in_flight_bytes,
+                    max_requests_per_worker=max_requests_per_worker,
+                )
+                async for data, missing_keys, failed_keys, _ in batches:
+                    lost += missing_keys + failed_keys
+                    for key, value in data.items():
+                        if sink is not None:
+                            sink[key] = value
+                            value = None
+                        for future in pending.pop(key):
+                            yield future, value
+                    del data
+
+                if lost:
+                    log = logger.warning if errors == "raise" else logger.debug
+                    log("Couldn't gather %s keys, rescheduling %s", len(lost), lost)
+                    for key in lost:
+                        self._send_to_scheduler({"op": "report-key", "key": key})
+                    for key in lost:
+                        with suppress(KeyError):
+                            self.futures[key].reset()
+                        if key in pending:
+                            track(key)
+        finally:
+            for key, fs in pending.items():
+                fs[0]._state.remove_done_callback(callbacks[key])
+
+    def gather_iter(
+        self,
+        futures,
+        errors="raise",
+        max_in_flight_bytes="256 MiB",
+        max_requests_per_worker=2,
+        sink=None,
+    ):
+        """Gather futures from distributed memory, yielding ``(future, result)``
+        pairs as the results arrive
+
+        Unlike :meth:`gather`, which holds all the results in memory at once, this
+        fetches the results of the finished futures directly from the workers, in
+        batches, and yields them as soon as each batch arrives, in no particular
+        order. At most ``max_in_flight_bytes`` of results are being fetched at any
+        time, so memory usage on the client is bounded as long as the results are
+        discarded after being consumed.
+
+        Returns an asynchronous iterator if the client is asynchronous, and a
+        regular iterator otherwise.
+
+        Parameters
+        ----------
+        futures : Collection of futures
+            This can be a possibly nested collection of Future objects.
+        errors : string
+            Either 'raise' or 'skip' if we should raise if a future has erred
+            or skip it
+        max_in_flight_bytes : int or str
+            Maximum total size of the results being fetched at the same time. A
+            single result larger than this is still fetched, on its own.
+        max_requests_per_worker : int
+            Maximum number of batches fetched from the same worker at the same time
+        sink : MutableMapping, optional
+            If provided, results are stored into ``sink[key]`` as they arrive, e.g.
+            to write them to disk with ``zict.File``, and are not yielded;
+            ``(future, None)`` pairs are yielded instead.
+
+        Examples
+        --------
+        >>> futures = client.map(inc, range(1000))  # doctest: +SKIP
+        >>> for future, result in client.gather_iter(futures):  # doctest: +SKIP
+        ...     process(result)
+
+        See Also
+        --------
+        Client.gather
+        as_completed
+        """
+        agen = self._gather_iter(
+            futures,
+            errors=errors,
+            max_in_flight_bytes=max_in_flight_bytes,
+            max_requests_per_worker=max_requests_per_worker,
+            sink=sink,
+        )
+        if self.asynchronous:
+            return agen
+        return self._iter_sync(agen)
+
+    def _iter_sync(self, agen):
+        """Iterate over an asynchronous generator from a synchronous client"""
+        try:
+            while True:
+                try:
+                    yield self.sync(agen.__anext__)
+                except StopAsyncIteration:
+                    return
+        finally:
+            self.sync(agen.aclose)
+
     async def _scatter(
         self,
         data,
@@ -2439,19 +2832,7 @@ class Client(SyncMethodMixin):
         else:
             data2 = valmap(to_serialize, data)
             if direct:
-                nthreads = None
-                start = time()
-                while not nthreads:
-                    if nthreads is not None:
-                        await asyncio.sleep(0.1)
-                    if time() > start + timeout:
-                        raise TimeoutError("No valid workers found")
-                    # Exclude paused and closing_gracefully workers
-                    nthreads = await self.scheduler.ncores_running(workers=workers)
-                if not nthreads:  # pragma: no cover
-                    raise ValueError("No valid workers found")
-                workers = list(nthreads.keys())
-
+                workers = await self._running_workers(workers, timeout)
                 _, who_has, nbytes = await scatter_to_workers(workers, data2, self.rpc)
 
                 await self.scheduler.update_data(
@@ -2600,6 +2981,248 @@ class Client(SyncMethodMixin):
             hash=hash,
         )
 
+    async def _running_workers(self, workers, timeout):
+        """Addresses of the running workers among ``workers``, waiting up to
+        ``timeout`` seconds for one to be available"""
+        nthreads = None
+        start = time()
+        while not nthreads:
+            if nthreads is not None:
+                await asyncio.sleep(0.1)
+            if time() > start + timeout:
+                raise TimeoutError("No valid workers found")
+            # Exclude paused and closing_gracefully workers
+            nthreads = await self.scheduler.ncores_running(workers=workers)
+        if not nthreads:  # pragma: no cover
+            raise ValueError("No valid workers found")
+        return list(nthreads.keys())
+
+    async def _scatter_iter(
+        self,
+        data,
+        workers=None,
+        broadcast=False,
+        direct=None,
+        hash=True,
+        chunk_size="16 MiB",
+        max_in_flight_bytes="256 MiB",
+        max_requests_per_worker=2,
+        timeout=no_default,
+    ):
+        if timeout is no_default:
+            timeout = self._timeout
+        if isinstance(workers, (str, Number)):
+            workers = [workers]
+        if direct is None:
+            direct = self.direct_to_workers is not False
+        chunk_size = parse_bytes(chunk_size)
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive; got {chunk_size}")
+        # Always allow at least one chunk in flight, however large
+        max_in_flight = max(1, parse_bytes(max_in_flight_bytes) // chunk_size)
+        workers = await self._running_workers(workers, timeout)
+        compression = get_compression_settings("distributed.comm.compression")
+
+        items = iter(data.items() if isinstance(data, dict) else data)
+        keyed = isinstance(data, dict)
+
+        def next_chunk():
+            chunk = {}
+            keys = []
+            size = 0
+            for item in items:
+                if keyed:
+                    key, x = item
+                elif hash:
+                    key = type(item).__name__ + "-" + tokenize(item)
+                    x = item
+                else:
+                    key = type(item).__name__ + "-" + uuid.uuid4().hex
+                    x = item
+                chunk[key] = value = _serialize_for_scatter(x, compression)
+                keys.append((key, type(x)))
+                size += sum(map(nbytes, value.frames))
+                if size >= chunk_size:
+                    break
+            return chunk, keys
+
+        names = []
+        types = {}
+
+        async def chunks():
+            while True:
+                chunk, keys = await offload(next_chunk)
+                if not chunk:
+                    return
+                for key, typ in keys:
+                    names.append(key)
+                    types[key] = typ
+                yield chunk
+
+        out = {}
+
+        def land(keys):
+            landed = []
+            for key in keys:
+                out[key] = Future(key, self, inform=False)
+                self.futures[key].finish(type=types[key])
+                landed.append(out[key])
+            return landed
+
+        if not direct:
+            await self._scatter_iter_through_scheduler(
+                chunks(), land, workers, broadcast, max_in_flight, timeout
+            )
+        else:
+            n = None if broadcast is True else broadcast
+            replicating = []
+            try:
+                async for who_has, nbytes_ in scatter_to_workers_iter(
+                    workers,
+                    chunks(),
+                    self.rpc,
+                    max_requests_per_worker=max_requests_per_worker,
+                    max_in_flight=max_in_flight,
+                ):
+                    await self.scheduler.update_data(
+                        who_has=who_has, nbytes=nbytes_, client=self.id
+                    )
+                    landed = land(who_has)
+                    if broadcast:
+                        # Relay the chunk from worker to worker while the next ones
+                        # are still being sent
+                        replicating.append(
+                            asyncio.create_task(
+                                self._replicate(landed, workers=workers, n=n)
+                            )
+                        )
+                await asyncio.gather(*replicating)
+            finally:
+                for task in replicating:
+                    task.cancel()
+
+        if keyed:
+            return out
+        return [out[key] for key in names]
+
+    async def _scatter_iter_through_scheduler(
+        self, chunks, land, workers, broadcast, max_in_flight, timeout
+    ):
+        """Send each chunk of :meth:`Client.scatter_iter` to the scheduler, which
+        forwards it to the workers, with up to ``max_in_flight`` chunks at once"""
+
+        async def scatter(chunk):
+            keys = await self.scheduler.scatter(
+                data=chunk,
+                workers=workers,
+                client=self.id,
+                broadcast=broadcast,
+                timeout=timeout,
+            )
+            land(keys)
+
+        in_flight = set()
+        try:
+            async for chunk in chunks:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = await asyncio.wait(
+                        in_flight, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        task.result()
+                in_flight.add(asyncio.create_task(scatter(chunk)))
+            await asyncio.gather(*in_flight)
+        finally:
+            for task in in_flight:
+                task.cancel()
+
+    def scatter_iter(
+        self,
+        data,
+        workers=None,
+        broadcast=False,
+        direct=None,
+        hash=True,
+        chunk_size="16 MiB",
+        max_in_flight_bytes="256 MiB",
+        max_requests_per_worker=2,
+        timeout=no_default,
+        asynchronous=None,
+    ):
+        """Scatter a stream of data into distributed memory
+
+        Unlike :meth:`Client.scatter`, which serializes all the data up front, this
+        consumes ``data`` lazily: elements are grouped into chunks of about
+        ``chunk_size`` bytes, which are serialized in a separate thread while the
+        previous chunks are being sent. Each chunk is sent directly to the worker
+        with the fewest chunks in flight, so a slow worker doesn't stall the others.
+        The client holds at most ``max_in_flight_bytes`` of serialized data at once,
+        however large the dataset.
+
+        Parameters
+        ----------
+        data : iterable or dict
+            Elements to scatter, e.g. a generator. If a dict, its keys are used as
+            the keys of the futures.
+        workers : list of addresses (optional)
+            Optionally constrain locations of data
+        broadcast : bool or int (defaults to False)
+            Whether to copy each element to all workers, or to this many workers.
+            Workers relay every chunk to each other, in a tree, as soon as it has
+            landed, instead of the client sending one copy to each worker.
+        direct : bool (optional)
+            Whether or not to connect directly to the workers, or to send the
+            chunks through the scheduler instead. Defaults to True, unless the
+            client was created with ``direct_to_workers=False``. Without a direct
+            connection, workers don't relay broadcast chunks while the next ones
+            are being sent.
+        hash : bool (optional)
+            Whether or not to hash data to determine key.
+            If False then this uses a random key
+        chunk_size : int or str (optional)
+            Target size of the chunks sent to the workers. Must be positive.
+        max_in_flight_bytes : int or str (optional)
+            Maximum size of the chunks being sent at once. At least one chunk is
+            always sent, even if it is larger.
+        max_requests_per_worker : int (optional)
+            Maximum number of chunks being sent to the same worker at once
+        timeout : number, optional
+            Time in seconds after which to raise a
+            ``dask.distributed.TimeoutError`` if no worker is available
+        asynchronous: bool
+            If True the client is in asynchronous mode
+
+        Returns
+        -------
+        List of futures in the order of ``data``, or dict of futures if ``data`` is
+        a dict.
+
+        Examples
+        --------
+        >>> def load():  # doctest: +SKIP
+        ...     for path in paths:
+        ...         yield np.load(path)
+        >>> futures = c.scatter_iter(load())  # doctest: +SKIP
+
+        See Also
+        --------
+        Client.scatter
+        Client.gather_iter
+        """
+        return self.sync(
+            self._scatter_iter,
+            data,
+            workers=workers,
+            broadcast=broadcast,
+            direct=direct,
+            hash=hash,
+            chunk_size=chunk_size,
+            max_in_flight_bytes=max_in_flight_bytes,
+            max_requests_per_worker=max_requests_per_worker,
+            timeout=timeout,
+            asynchronous=asynchronous,
+        )
+
     async def _cancel(self, futures, force=False):
         # FIXME: This method is asynchronous since interacting with the FutureState below requires an event loop.
         keys = list({f.key for f in futures_of(futures)})
@@ -3116,8 +3739,18 @@ class Client(SyncMethodMixin):
             if actors is not None and actors is not True and actors is not False:
                 actors = list(self._expand_key(actors))
 
+            # Only the graphs of submit and map, which come already ordered, are
+            # batched. Any other graph is sent right away, after the batched graphs
+            # it may depend on.
+            batch = self._current_submit_batch()
+            if batch is not None and (
+                internal_priority is None or isinstance(dsk, HighLevelGraph)
+            ):
+                self._flush_submit_batch()
+                batch = None
+
             # Make sure `dsk` is a high level graph
-            if not isinstance(dsk, HighLevelGraph):
+            if batch is None and not isinstance(dsk, HighLevelGraph):
                 dsk = HighLevelGraph.from_collections(id(dsk), dsk, dependencies=())
 
             annotations = {}
@@ -3148,40 +3781,65 @@ class Client(SyncMethodMixin):
 
             # Create futures before sending graph (helps avoid contention)
             futures = {key: Future(key, self, inform=False) for key in keyset}
-            # Circular import
-            from distributed.protocol import serialize
-            from distributed.protocol.serialize import ToPickle
+            if batch is not None:
+                batch.append(
+                    {
+                        "dsk": dsk,
+                        "keys": keys,
+                        "internal_priority": internal_priority,
+                        "fifo_timeout": fifo_timeout,
+                        "actors": actors,
+                        "annotations": annotations,
+                    }
+                )
+            else:
+                self._send_graph(
+                    dsk,
+                    keys,
+                    internal_priority=internal_priority,
+                    fifo_timeout=fifo_timeout,
+                    actors=actors,
+                    annotations=annotations,
+                )
+            return futures
 
-            header, frames = serialize(ToPickle(dsk), on_error="raise")
+    def _send_graph(
+        self, dsk, keys, *, internal_priority, fifo_timeout, actors, annotations
+    ):
+        """Send a graph to the scheduler in an ``update-graph`` message"""
+        # Circular import
+        from distributed.protocol import serialize
+        from distributed.protocol.serialize import ToPickle
 
-            pickled_size = sum(map(nbytes, [header] + frames))
-            if pickled_size > parse_bytes(
-                dask.config.get("distributed.admin.large-graph-warning-threshold")
-            ):
-                warnings.warn(
-                    f"Sending large graph of size {format_bytes(pickled_size)}.\n"
-                    "This may cause some slowdown.\n"
-                    "Consider scattering data ahead of time and using futures."
-                )
+        header, frames = serialize(ToPickle(dsk), on_error="raise")
 
-            computations = self._get_computation_code(
-                nframes=dask.config.get("distributed.diagnostics.computations.nframes")
-            )
-            self._send_to_scheduler(
-                {
-                    "op": "update-graph",
-                    "graph_header": header,
-                    "graph_frames": frames,
-                    "keys": list(keys),
-                    "internal_priority": internal_priority,
-                    "submitting_task": getattr(thread_state, "key", None),
-                    "fifo_timeout": fifo_timeout,
-                    "actors": actors,
-                    "code": ToPickle(computations),
-                    "annotations": ToPickle(annotations),
-                }
+        pickled_size = sum(map(nbytes, [header] + frames))
+        if pickled_size > parse_bytes(
+            dask.config.get("distributed.admin.large-graph-warning-threshold")
+        ):
+            warnings.warn(
+                f"Sending large graph of size {format_bytes(pickled_size)}.\n"
+                "This may cause some slowdown.\n"
+                "Consider scattering data ahead of time and using futures."
             )
-            return futures
+
+        computations = self._get_computation_code(
+            nframes=dask.config.get("distributed.diagnostics.computations.nframes")
+        )
+        self._send_to_scheduler(
+            {
+                "op": "update-graph",
+                "graph_header": header,
+                "graph_frames": frames,
+                "keys": list(keys),
+                "internal_priority": internal_priority,
+                "submitting_task": getattr(thread_state, "key", None),
+                "fifo_timeout": fifo_timeout,
+                "actors": actors,
+                "code": ToPickle(computations),
+                "annotations": ToPickle(annotations),
+            }
+        )
 
     def get(
         self,
@@ -5416,18 +6074,31 @@ async def _wait(fs, timeout=None, return_when=ALL_COMPLETED):
             "  Good: wait([x, y, z])"
         )
     fs = futures_of(fs)
-    if return_when == ALL_COMPLETED:
-        future = distributed.utils.All({f._state.wait() for f in fs})
-    elif return_when == FIRST_COMPLETED:
-        future = distributed.utils.Any({f._state.wait() for f in fs})
-    else:
+    if return_when not in (ALL_COMPLETED, FIRST_COMPLETED):
         raise NotImplementedError(
             "Only return_when='ALL_COMPLETED' and 'FIRST_COMPLETED' are supported"
         )
 
-    if timeout is not None:
-        future = wait_for(future, timeout)
-    await future
+    # Count completions with callbacks rather than awaiting each future
+    all_states = {f._state for f in fs}
+    states = {st for st in all_states if not st.done()}
+    if states and (return_when == ALL_COMPLETED or len(states) == len(all_states)):
+        remaining = len(states) if return_when == ALL_COMPLETED else 1
+        event = asyncio.Event()
+
+        def on_done():
+            nonlocal remaining
+            remaining -= 1
+            if remaining <= 0:
+                event.set()
+
+        for st in states:
+            st.add_done_callback(on_done)
+        try:
+            await wait_for(event.wait(), timeout)
+        finally:
+            for st in states:
+                st.remove_done_callback(on_done)
 
     done, not_done = (
         {fu for fu in fs if fu.status != "pending"},
@@ -5466,17 +6137,22 @@ def wait(fs, timeout=None, return_when=ALL_COMPLETED):
 async def _as_completed(fs, queue):
     fs = futures_of(fs)
     groups = groupby(lambda f: f.key, fs)
-    firsts = [v[0] for v in groups.values()]
-    wait_iterator = gen.WaitIterator(
-        *map(asyncio.ensure_future, [f._state.wait() for f in firsts])
-    )
+    remaining = len(groups)
+    all_done = asyncio.Event()
 
-    while not wait_iterator.done():
-        await wait_iterator.next()
-        # TODO: handle case of restarted futures
-        future = firsts[wait_iterator.current_index]
-        for f in groups[future.key]:
+    def on_done(key):
+        nonlocal remaining
+        for f in groups[key]:
             queue.put_nowait(f)
+        remaining -= 1
+        if not remaining:
+            all_done.set()
+
+    # TODO: handle case of restarted futures
+    for key, (first, *_) in groups.items():
+        first._state.add_done_callback(partial(on_done, key))
+    if remaining:
+        await all_done.wait()
 
 
 async def _first_completed(futures):
@@ -5574,6 +6250,9 @@ class as_completed:
         self.with_results = with_results
         self.raise_errors = raise_errors
         self._deadline = Deadline.after(parse_timedelta(timeout))
+        self._to_gather = []
+        self._gathering = False
+        self._notifying = False
 
         if futures:
             self.update(futures)
@@ -5587,15 +6266,61 @@ class as_completed:
             return self._condition
 
     async def _track_future(self, future):
+        """Wait for an actor future to complete"""
         try:
             await _wait(future)
         except CancelledError:
             pass
+        result = None
         if self.with_results:
-            try:
-                result = await future._result(raiseit=False)
-            except CancelledError as exc:
-                result = exc
+            result = await self._result(future)
+        self._put(future, result)
+
+    def _track_futures(self, futures):
+        """Register completion callbacks on futures, instead of awaiting each of
+        them in its own coroutine. Called on the event loop."""
+        for future in futures:
+            future._state.add_done_callback(partial(self._on_done, future))
+
+    def _on_done(self, future):
+        if not self.with_results:
+            self._put(future, None)
+        elif future.status == "finished":
+            # Gather the results of all the futures that completed at the same time
+            # at once
+            self._to_gather.append(future)
+            if not self._gathering:
+                self._gathering = True
+                self.loop.add_callback(self._gather_results)
+        elif future.status == "error":
+            st = future._state
+            self._put(future, clean_exception(st.exception, st.traceback))
+        else:
+            self._put(future, CancelledError(future.key))
+
+    @staticmethod
+    async def _result(future):
+        try:
+            return await future._result(raiseit=False)
+        except CancelledError as exc:
+            return exc
+
+    async def _gather_results(self):
+        try:
+            while self._to_gather:
+                batch, self._to_gather = self._to_gather, []
+                for client, futures in groupby(lambda f: f.client, batch).items():
+                    try:
+                        results = await client._gather(futures)
+                    except Exception:
+                        # Some futures failed or were lost in the meantime
+                        results = [await self._result(f) for f in futures]
+                    for future, result in zip(futures, results):
+                        self._put(future, result)
+        finally:
+            self._gathering = False
+
+    def _put(self, future, result):
         with self.lock:
             if future in self.futures:
                 self.futures[future] -= 1
@@ -5605,10 +6330,18 @@ class as_completed:
                     self.queue.put_nowait((future, result))
                 else:
                     self.queue.put_nowait(future)
-                async with self.condition:
-                    self.condition.notify()
-                with self.thread_condition:
-                    self.thread_condition.notify()
+                # Wake up the consumers once for all the futures that completed
+                # during this iteration of the event loop
+                if not self._notifying:
+                    self._notifying = True
+                    self.loop.add_callback(self._notify)
+
+    async def _notify(self):
+        self._notifying = False
+        async with self.condition:
+            self.condition.notify_all()
+        with self.thread_condition:
+            self.thread_condition.notify_all()
 
     def update(self, futures):
         """Add multiple futures to the collection.
@@ -5616,12 +6349,20 @@ class as_completed:
         The added futures will emit from the iterator once they finish"""
         from distributed.actor import BaseActorFuture
 
-        with self.lock:
-            for f in futures:
-                if not isinstance(f, (Future, BaseActorFuture)):
-                    raise TypeError("Input must be a future, got %s" % f)
-                self.futures[f] += 1
-                self.loop.add_callback(self._track_future, f)
+        tracked = []
+        try:
+            with self.lock:
+                for f in futures:
+                    if not isinstance(f, (Future, BaseActorFuture)):
+                        raise TypeError("Input must be a future, got %s" % f)
+                    self.futures[f] += 1
+                    if isinstance(f, Future):
+                        tracked.append(f)
+                    else:
+                        self.loop.add_callback(self._track_future, f)
+        finally:
+            if tracked:
+                self.loop.add_callback(self._track_futures, tracked)
 
     def add(self, future):
         """Add a future to the collection
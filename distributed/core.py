@@ -342,6 +342,10 @@ class Server:
     digests_total_since_heartbeat: defaultdict[Hashable, float]
     digests_max: defaultdict[Hashable, float]
 
+    #: Record the duration of each call to a stream handler as the
+    #: ``("stream-handler", op, "seconds")`` metric
+    digest_stream_handlers: ClassVar[bool] = False
+
     _last_tick: float
     _tick_counter: int
     _last_tick_counter: int
@@ -1047,10 +1051,15 @@ class Server:
                             )
                             break
                         handler = self.stream_handlers[op]
+                        start = time()
                         if iscoroutinefunction(handler):
                             await handler(**merge(extra, msg))
                         else:
                             handler(**merge(extra, msg))
+                        if self.digest_stream_handlers:
+                            self.digest_metric(
+                                ("stream-handler", op, "seconds"), time() - start
+                            )
                     else:
                         logger.error("odd message %s", msg)
                 await asyncio.sleep(0)
@@ -0,0 +1,154 @@
+"""Scheduler extension that shares the cluster between tenants, so that a huge
+computation submitted by one client doesn't starve the interactive work of others.
+
+Enable it by setting ``distributed.scheduler.fair-share.enabled``.
+"""
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+import dask.config
+from dask.typing import Key
+
+if TYPE_CHECKING:
+    from distributed.scheduler import Scheduler, TaskState
+
+
+class FairShareExtension:
+    """Weighted fair share of the cluster between tenants
+
+    Every task belongs to a tenant: the value of its ``tenant`` annotation, e.g.
+    ``with dask.annotate(tenant="interactive")``, or else the ID of the client that
+    submitted it. Tenants are weighted by ``distributed.scheduler.fair-share.weights``
+    (default 1), which can be changed at runtime through the ``fair_share_set_weight``
+    scheduler handler.
+
+    This is start-time fair queuing applied to task priorities. The ``generation``
+    element of the priority of a new task, which otherwise only grows with every
+    new graph, is replaced by a *virtual time tag*: the tasks of a tenant are tagged
+    ``1 / weight`` apart, in ``dask.order`` order, starting from the later of the
+    last tag of the same tenant and the tag of the last task that was sent to a
+    worker. Like generations, graphs submitted by a tenant within ``fifo_timeout``
+    of each other start from the same tag. Both the scheduler queue and the workers
+    run tasks by priority, so
+    tenants are served in proportion to their weights, regardless of how many tasks
+    they submitted; a tenant that submits a small graph on a busy cluster only
+    waits behind a few tasks of each other tenant.
+
+    User priorities still take precedence, so they act as priority classes within
+    which tenants share the cluster fairly.
+    """
+
+    scheduler: Scheduler
+    #: Weight of each tenant; tenants not listed have weight 1
+    weights: dict[str, float]
+    #: Tag of the last task that was sent to a worker
+    vtime: float
+    #: Tag of the last task submitted by each tenant
+    finish_tags: dict[str, float]
+    #: Starting tag of the current generation of each tenant, and the time when
+    #: the generation started
+    generations: dict[str, tuple[float, float]]
+    #: Tenant of each task that was tagged and has not been forgotten yet
+    tenants: dict[Key, str]
+    #: Total time spent computing tasks, by tenant
+    compute_time: defaultdict[str, float]
+    #: Number of tasks computed, by tenant
+    tasks_computed: defaultdict[str, int]
+
+    def __init__(self, scheduler: Scheduler):
+        self.scheduler = scheduler
+        self.weights = {
+            str(k): float(v)
+            for k, v in dask.config.get(
+                "distributed.scheduler.fair-share.weights"
+            ).items()
+        }
+        self.vtime = 0.0
+        self.finish_tags = {}
+        self.generations = {}
+        self.tenants = {}
+        self.compute_time = defaultdict(float)
+        self.tasks_computed = defaultdict(int)
+        scheduler.handlers["fair_share_info"] = self.info
+        scheduler.handlers["fair_share_set_weight"] = self.set_weight
+        if dask.config.get("distributed.scheduler.fair-share.enabled"):
+            scheduler.fair_share = self
+
+    def tenant(self, ts: TaskState, client: str | None) -> str:
+        if ts.annotations and "tenant" in ts.annotations:
+            return str(ts.annotations["tenant"])
+        return client or "unknown"
+
+    def tag(
+        self,
+        tasks: Iterable[TaskState],
+        internal_priority: dict[Key, int],
+        client: str | None,
+        start: float,
+        fifo_timeout: float,
+    ) -> dict[Key, float]:
+        """Called when a client submits new tasks, in place of bumping the graph
+        generation. Returns the virtual time tag of each task.
+        """
+        by_tenant: defaultdict[str, list[TaskState]] = defaultdict(list)
+        for ts in tasks:
+            if not ts.priority and ts.key in internal_priority:
+                by_tenant[self.tenant(ts, client)].append(ts)
+
+        tags = {}
+        for tenant, tenant_tasks in by_tenant.items():
+            tenant_tasks.sort(key=lambda ts: internal_priority[ts.key])
+            step = 1 / self.weights.get(tenant, 1.0)
+            base, generation_start = self.generations.get(tenant, (0.0, -math.inf))
+            if generation_start + fifo_timeout < start:
+                base = max(self.vtime, self.finish_tags.get(tenant, 0.0))
+                self.generations[tenant] = base, start
+            tag = base
+            for ts in tenant_tasks:
+                tag += step
+                tags[ts.key] = tag
+                self.tenants[ts.key] = tenant
+            self.finish_tags[tenant] = max(tag, self.finish_tags.get(tenant, 0.0))
+        return tags
+
+    def started(self, ts: TaskState) -> None:
+        """Called when a task is sent to a worker"""
+        if ts.key in self.tenants:
+            assert ts.priority
+            self.vtime = max(self.vtime, ts.priority[1])
+
+    def finished(self, ts: TaskState, startstops: Iterable[dict]) -> None:
+        """Called when a task has been computed"""
+        tenant = self.tenants.get(ts.key)
+        if tenant is None:
+            return
+        self.tasks_computed[tenant] += 1
+        for startstop in startstops:
+            if startstop["action"] == "compute":
+                self.compute_time[tenant] += startstop["stop"] - startstop["start"]
+
+    def forget(self, ts: TaskState) -> None:
+        """Called when a task is forgotten by the scheduler"""
+        self.tenants.pop(ts.key, None)
+
+    def set_weight(self, tenant: str, weight: float) -> None:
+        if weight <= 0:
+            raise ValueError(f"Weight must be positive; got {weight}")
+        self.weights[tenant] = weight
+
+    def info(self) -> dict[str, dict[str, Any]]:
+        """Weight and achieved share of the total compute time of every tenant"""
+        total = sum(self.compute_time.values())
+        return {
+            tenant: {
+                "weight": self.weights.get(tenant, 1.0),
+                "tasks": self.tasks_computed[tenant],
+                "compute": compute,
+                "share": compute / total if total else 0.0,
+            }
+            for tenant, compute in self.compute_time.items()
+        }
@@ -5,7 +5,7 @@ from time import time
 
 import prometheus_client
 import toolz
-from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, Metric
 
 from distributed.http.prometheus import PrometheusCollector
 from distributed.http.scheduler.prometheus.semaphore import SemaphoreMetricCollector
@@ -147,6 +147,38 @@ class SchedulerMetricCollector(PrometheusCollector):
                 prefix_state_counts.add_metric([tp.name, state], count)
         yield prefix_state_counts
 
+        result_cache = self.server.result_cache
+        if result_cache is not None:
+            for name, value in (
+                ("hits", result_cache.hits),
+                ("misses", result_cache.misses),
+                ("evictions", result_cache.evictions),
+            ):
+                yield CounterMetricFamily(
+                    self.build_name(f"result_cache_{name}"),
+                    f"Number of result cache {name}",
+                    value=value,
+                )
+            yield GaugeMetricFamily(
+                self.build_name("result_cache_bytes"),
+                "Total size of the results retained by the result cache",
+                value=result_cache.nbytes,
+            )
+
+        fair_share = self.server.fair_share
+        if fair_share is not None:
+            tenant_compute = CounterMetricFamily(
+                self.build_name("fair_share_compute"),
+                "Total time spent computing the tasks of each tenant",
+                labels=["tenant"],
+                unit="seconds",
+            )
+            for tenant, seconds in fair_share.compute_time.items():
+                tenant_compute.add_metric([tenant], seconds)
+            yield tenant_compute
+
+        yield from self.collect_handler_durations()
+
         now = time()
         max_tick_duration = max(
             self.server.digests_max["tick_duration"],
@@ -166,6 +198,51 @@ class SchedulerMetricCollector(PrometheusCollector):
 
         self.server.digests_max.clear()
 
+    def collect_handler_durations(self) -> Iterator[Metric]:
+        """Time spent on the event loop by stream handlers, task state transitions
+        and plugin callbacks, as recorded by ``Scheduler.digest_metric``
+        """
+        labels = {
+            "stream-handler": ["op"],
+            "transition": ["start", "finish"],
+            "plugin": ["plugin", "callback"],
+        }
+        descriptions = {
+            "stream-handler": "stream handlers",
+            "transition": "task state transitions",
+            "plugin": "plugin callbacks",
+        }
+        totals = {
+            context: CounterMetricFamily(
+                self.build_name(f"{context.replace('-', '_')}_duration"),
+                f"Total time spent in {descriptions[context]}",
+                labels=labels[context],
+                unit="seconds",
+            )
+            for context in labels
+        }
+        maxima = {
+            context: GaugeMetricFamily(
+                self.build_name(f"{context.replace('-', '_')}_duration_maximum"),
+                f"Maximum time spent in a single call of {descriptions[context]} "
+                "since Prometheus last scraped metrics",
+                labels=labels[context],
+                unit="seconds",
+            )
+            for context in labels
+        }
+        for k, v in self.server.digests_total.items():
+            if not isinstance(k, tuple) or k[0] not in labels or k[-1] != "seconds":
+                continue
+            context, *label_values, _ = k
+            label_values = [str(label) for label in label_values]
+            totals[context].add_metric(label_values, v)
+            maxima[context].add_metric(
+                label_values, self.server.digests_max.get(k, 0)
+            )
+        yield from totals.values()
+        yield from maxima.values()
+
 
 COLLECTORS = [
     SchedulerMetricCollector,
@@ -124,6 +124,12 @@ async def test_prometheus(c, s, a, b):
         "dask_scheduler_prefix_state_totals",
         "dask_scheduler_tick_count",
         "dask_scheduler_tick_duration_maximum_seconds",
+        "dask_scheduler_stream_handler_duration_seconds",
+        "dask_scheduler_stream_handler_duration_maximum_seconds",
+        "dask_scheduler_transition_duration_seconds",
+        "dask_scheduler_transition_duration_maximum_seconds",
+        "dask_scheduler_plugin_duration_seconds",
+        "dask_scheduler_plugin_duration_maximum_seconds",
     }
 
     try:
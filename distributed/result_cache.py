@@ -0,0 +1,149 @@
+"""Scheduler extension that keeps the results of released tasks on the workers, so
+that graphs which are submitted over and over again don't need to be recomputed.
+
+Enable it by setting ``distributed.scheduler.result-cache-size`` to a non-zero
+number of bytes.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any
+
+import dask.config
+from dask.typing import Key
+from dask.utils import parse_bytes
+
+if TYPE_CHECKING:
+    from distributed.scheduler import ClientState, Recs, Scheduler, TaskState
+
+
+class ResultCacheExtension:
+    """Retain the results of recently released tasks in worker memory
+
+    When no client wants a computed task in memory anymore, instead of releasing
+    it the scheduler hands it over to the pseudo-client ``result-cache``, which
+    keeps it in memory until the total size of the retained results exceeds the
+    configured budget; the least recently released results are then evicted.
+
+    When a client submits a graph again, the keys that are found in the cache are
+    handed back to it and are not recomputed.
+
+    Results that are lost, e.g. because the worker holding them died, are dropped
+    from the cache instead of being recomputed.
+    """
+
+    CLIENT = "result-cache"
+
+    scheduler: Scheduler
+    #: Pseudo-client that wants the retained tasks
+    client: ClientState
+    #: Maximum total size, in bytes, of the retained results
+    limit: int
+    #: Retained keys and their size, from least to most recently released
+    keys: OrderedDict[Key, int]
+    #: Total size of the retained results
+    nbytes: int
+    #: Number of keys requested by clients which were found in the cache
+    hits: int
+    #: Number of keys requested by clients which had to be computed
+    misses: int
+    #: Number of keys evicted from the cache because it was full
+    evictions: int
+
+    def __init__(self, scheduler: Scheduler):
+        self.scheduler = scheduler
+        self.limit = parse_bytes(
+            dask.config.get("distributed.scheduler.result-cache-size")
+        )
+        self.keys = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        from distributed.scheduler import ClientState
+
+        self.client = ClientState(self.CLIENT)
+        scheduler.handlers["result_cache_info"] = self.info
+        scheduler.handlers["result_cache_clear"] = self.clear
+        if self.limit:
+            scheduler.clients[self.CLIENT] = self.client
+            scheduler.result_cache = self
+
+    def retain(self, ts: TaskState, cs: ClientState, recommendations: Recs) -> bool:
+        """Called when client ``cs`` released ``ts`` and nobody else wants it.
+
+        Returns True if the task was retained by the cache, in which case it must
+        not be released. Evicted tasks are released into ``recommendations``.
+        """
+        if cs.client_key == self.CLIENT or ts.state != "memory" or not ts.run_spec:
+            return False
+        nbytes = ts.get_nbytes()
+        if nbytes > self.limit:
+            return False
+
+        cache_cs = self.client
+        if ts.who_wants is None:
+            ts.who_wants = set()
+        ts.who_wants.add(cache_cs)
+        cache_cs.wants_what.add(ts)
+        self.keys[ts.key] = nbytes
+        self.nbytes += nbytes
+
+        evicted = []
+        while self.nbytes > self.limit:
+            key, size = self.keys.popitem(last=False)
+            self.nbytes -= size
+            evicted.append(key)
+        if evicted:
+            self.evictions += len(evicted)
+            self.scheduler._client_releases_keys(evicted, cache_cs, recommendations)
+        return True
+
+    def discard(self, ts: TaskState) -> bool:
+        """Stop retaining a task, without releasing it.
+
+        Returns True if the task was retained by the cache.
+        """
+        nbytes = self.keys.pop(ts.key, None)
+        if nbytes is None:
+            return False
+        self.nbytes -= nbytes
+        cache_cs = self.client
+        cache_cs.wants_what.discard(ts)
+        if ts.who_wants:
+            ts.who_wants.discard(cache_cs)
+        return True
+
+    def lookup(self, keys: Iterable[Key]) -> None:
+        """Called when a client requests ``keys``, before it is registered as
+        wanting them. Keys found in the cache are handed over to the client.
+        """
+        tasks = self.scheduler.tasks
+        for key in keys:
+            if key in self.keys:
+                self.hits += 1
+                self.discard(tasks[key])
+            # Keys with lost dependencies were cancelled and are no longer here
+            elif (ts := tasks.get(key)) is not None and ts.state != "memory":
+                self.misses += 1
+
+    def clear(self, stimulus_id: str | None = None) -> None:
+        """Release all retained results"""
+        keys = list(self.keys)
+        self.keys.clear()
+        self.nbytes = 0
+        if keys:
+            self.scheduler.client_releases_keys(
+                keys, self.CLIENT, stimulus_id=stimulus_id or "result-cache-clear"
+            )
+
+    def info(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "nbytes": self.nbytes,
+            "keys": len(self.keys),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -29,6 +29,7 @@ from collections.abc import (
     Sequence,
     Set,
 )
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import suppress
 from functools import partial
 from typing import TYPE_CHECKING, Any, ClassVar, Literal, NamedTuple, cast, overload
@@ -97,6 +98,7 @@ from distributed.core import (
 from distributed.diagnostics.memory_sampler import MemorySamplerExtension
 from distributed.diagnostics.plugin import SchedulerPlugin, _get_plugin_name
 from distributed.event import EventExtension
+from distributed.fair_share import FairShareExtension
 from distributed.http import get_handlers
 from distributed.lock import LockExtension
 from distributed.metrics import time
@@ -110,6 +112,7 @@ from distributed.publish import PublishExtension
 from distributed.pubsub import PubSubSchedulerExtension
 from distributed.queues import QueueExtension
 from distributed.recreate_tasks import ReplayTaskScheduler
+from distributed.result_cache import ResultCacheExtension
 from distributed.security import Security
 from distributed.semaphore import SemaphoreExtension
 from distributed.shuffle import ShuffleSchedulerPlugin
@@ -126,6 +129,7 @@ from distributed.utils import (
     log_errors,
     offload,
     recursive_to_dict,
+    run_in_executor_with_context,
     wait_for,
 )
 from distributed.utils_comm import (
@@ -175,12 +179,16 @@ DEFAULT_DATA_SIZE = parse_bytes(
     dask.config.get("distributed.scheduler.default-data-size")
 )
 STIMULUS_ID_UNSET = "<stimulus_id unset>"
+# Cap on how much the heartbeat interval is stretched while the event loop lags
+HEARTBEAT_MAX_SLOWDOWN = 5
 
 DEFAULT_EXTENSIONS = {
     "locks": LockExtension,
     "multi_locks": MultiLockExtension,
     "publish": PublishExtension,
     "replay-tasks": ReplayTaskScheduler,
+    "result_cache": ResultCacheExtension,
+    "fair_share": FairShareExtension,
     "queues": QueueExtension,
     "variables": VariableExtension,
     "pubsub": PubSubSchedulerExtension,
@@ -939,12 +947,20 @@ class TaskPrefix:
     #: An exponentially weighted moving average duration of all tasks with this prefix
     duration_average: float
 
+    #: An exponentially weighted moving average of the output size of all tasks with
+    #: this prefix, or -1 if unknown. Used to predict the size of tasks that have yet
+    #: to run.
+    nbytes_average: float
+
     #: Numbers of times a task was marked as suspicious with this prefix
     suspicious: int
 
     #: Store timings for each prefix-action
     all_durations: defaultdict[str, float]
 
+    #: Number of executions whose duration is recorded in ``all_durations["compute"]``
+    compute_count: int
+
     #: This measures the maximum recorded live execution time and can be used to
     #: detect outliers
     max_exec_time: float
@@ -961,12 +977,14 @@ class TaskPrefix:
         self.name = name
         self.groups = []
         self.all_durations = defaultdict(float)
+        self.compute_count = 0
         self.state_counts = defaultdict(int)
         task_durations = dask.config.get("distributed.scheduler.default-task-durations")
         if self.name in task_durations:
             self.duration_average = parse_timedelta(task_durations[self.name])
         else:
             self.duration_average = -1
+        self.nbytes_average = -1
         self.max_exec_time = -1
         self.suspicious = 0
 
@@ -975,10 +993,18 @@ class TaskPrefix:
         if duration > 2 * self.duration_average:
             self.duration_average = -1
 
+    def add_nbytes(self, nbytes: int) -> None:
+        old = self.nbytes_average
+        if old < 0:
+            self.nbytes_average = nbytes
+        else:
+            self.nbytes_average = 0.5 * nbytes + 0.5 * old
+
     def add_duration(self, action: str, start: float, stop: float) -> None:
         duration = stop - start
         self.all_durations[action] += duration
         if action == "compute":
+            self.compute_count += 1
             old = self.duration_average
             if old < 0:
                 self.duration_average = duration
@@ -1070,6 +1096,11 @@ class TaskGroup:
     #: subsequent tasks until a new worker is chosen.
     last_worker_tasks_left: int
 
+    #: With queuing and ``distributed.scheduler.co-assign-siblings`` enabled, the
+    #: downstream tasks fed by the task of this group most recently assigned to
+    #: `last_worker`. See `SchedulerState.decide_worker_rootish_queuing_enabled`.
+    last_worker_targets: set[TaskState]
+
     prefix: TaskPrefix | None
 
     #: Earliest time when a task belonging to this group started computing;
@@ -1110,6 +1141,7 @@ class TaskGroup:
         self.all_durations = defaultdict(float)
         self.last_worker = None
         self.last_worker_tasks_left = 0
+        self.last_worker_targets = set()
         self.span_id = None
 
     def add_duration(self, action: str, start: float, stop: float) -> None:
@@ -1171,6 +1203,14 @@ class TaskGroup:
         )
 
 
+#: Shared, immutable placeholder for :attr:`TaskState.dependencies` and
+#: :attr:`TaskState.dependents`. Root tasks have no dependencies and the outputs of a
+#: graph have no dependents, so allocating an empty set for each of them would add up
+#: to several hundred bytes per task on large graphs. It is replaced by an actual set
+#: upon the first insertion; see :meth:`TaskState.add_dependency`.
+_NO_TASKS = cast("set[TaskState]", frozenset())
+
+
 class TaskState:
     """A simple object holding information about a task.
 
@@ -1217,10 +1257,14 @@ class TaskState:
     #: A task can only be executed once all its dependencies have already been
     #: successfully executed and have their result stored on at least one worker. This
     #: is tracked by progressively draining the :attr:`waiting_on` set.
+    #:
+    #: When empty, this is a shared immutable placeholder; use :meth:`add_dependency`
+    #: to populate it.
     dependencies: set[TaskState]
 
     #: The set of tasks which depend on this task.  Only tasks still alive are listed in
     #: this set. This is the reverse mapping of :attr:`dependencies`.
+    #: Like :attr:`dependencies`, it is a shared immutable placeholder when empty.
     dependents: set[TaskState]
 
     #: Whether any of the dependencies of this task has been forgotten. For memory
@@ -1424,8 +1468,8 @@ class TaskState:
         self.nbytes = -1
         self.priority = None
         self.who_wants = None
-        self.dependencies = set()
-        self.dependents = set()
+        self.dependencies = _NO_TASKS
+        self.dependents = _NO_TASKS
         self.waiting_on = None
         self.waiters = None
         self.who_has = None
@@ -1471,8 +1515,12 @@ class TaskState:
 
     def add_dependency(self, other: TaskState) -> None:
         """Add another task as a dependency of this task"""
+        if self.dependencies is _NO_TASKS:
+            self.dependencies = set()
         self.dependencies.add(other)
         self.group.dependencies.add(other.group)
+        if other.dependents is _NO_TASKS:
+            other.dependents = set()
         other.dependents.add(self)
 
     def get_nbytes(self) -> int:
@@ -1483,6 +1531,8 @@ class TaskState:
         old_nbytes = self.nbytes
         if old_nbytes >= 0:
             diff -= old_nbytes
+        else:
+            self.prefix.add_nbytes(nbytes)
         self.group.nbytes_total += diff
         for ws in self.who_has or ():
             ws.nbytes += diff
@@ -1604,6 +1654,15 @@ class SchedulerState:
     #: Similar to `idle`
     #: Definition based on assigned tasks
     idle_task_count: set[WorkerState]
+    #: The workers of `idle_task_count`, sorted by number of processing tasks per
+    #: thread and then by address, so that the least busy one can be found in
+    #: O(1) when scheduler-side queuing is enabled. Maintained alongside
+    #: `idle_task_count` by :meth:`_set_idle_task_count`.
+    #: {(processing tasks per thread, address): WorkerState}
+    #: (actually a SortedDict, but the sortedcontainers package isn't annotated).
+    _idle_task_count_by_load: dict[tuple[float, str], WorkerState]
+    #: Current key of each worker in `_idle_task_count_by_load`
+    _idle_task_count_load: dict[WorkerState, tuple[float, str]]
     #: Workers that are fully utilized. May include non-running workers.
     saturated: set[WorkerState]
     #: Current number of threads across all workers
@@ -1657,8 +1716,16 @@ class SchedulerState:
     #: History of task state transitions.
     #: The length can be tweaked through
     #: distributed.admin.low-level-log-length
+    #: The fraction of tasks that are recorded can be tweaked through
+    #: distributed.scheduler.transition-log-sampling
     transition_log: deque[Transition]
 
+    #: Keys and task prefix names whose transitions are always recorded in
+    #: `transition_log`, regardless of sampling.
+    #: See :meth:`start_recording_transitions`.
+    transition_log_keys: set[Key]
+    transition_log_prefixes: set[str]
+
     #: Total number of transitions since the cluster was started
     transition_counter: int
 
@@ -1672,6 +1739,25 @@ class SchedulerState:
 
     _task_prefix_count_global: defaultdict[str, int]
     _network_occ_global: float
+
+    #: Retains released results for reuse, if ``distributed.scheduler.result-cache-size``
+    #: is set. See :class:`~distributed.result_cache.ResultCacheExtension`.
+    result_cache: ResultCacheExtension | None
+
+    #: Shares the cluster between tenants, if
+    #: ``distributed.scheduler.fair-share.enabled`` is set. See
+    #: :class:`~distributed.fair_share.FairShareExtension`.
+    fair_share: FairShareExtension | None
+
+    #: Keys that transitioned since the last call to
+    #: :meth:`Scheduler.validate_touched`, or None if incremental validation is
+    #: disabled (see ``distributed.scheduler.validation-interval``)
+    _validation_touched: set[Key] | None
+
+    #: Duplicates of straggling processing tasks started by
+    #: :meth:`Scheduler.check_stragglers`, as {key: (worker, run_id)}. None if the
+    #: duplicate failed or its worker left; the task is not duplicated again.
+    _speculative: dict[Key, tuple[WorkerState, int] | None]
     ######################
     # Cached configuration
     ######################
@@ -1688,8 +1774,14 @@ class SchedulerState:
     MEMORY_REBALANCE_RECIPIENT_MAX: float
     #: distributed.worker.memory.rebalance.sender-recipient-gap / 2
     MEMORY_REBALANCE_HALF_GAP: float
+    #: distributed.worker.memory.target
+    MEMORY_TARGET: float | Literal[False]
     #: distributed.scheduler.worker-saturation
     WORKER_SATURATION: float
+    #: distributed.scheduler.co-assign-siblings
+    CO_ASSIGN_SIBLINGS: bool
+    #: distributed.scheduler.transition-log-sampling
+    TRANSITION_LOG_SAMPLING: float
 
     __slots__ = tuple(__annotations__)
 
@@ -1717,6 +1809,8 @@ class SchedulerState:
         self.host_info = host_info
         self.idle = SortedDict()
         self.idle_task_count = set()
+        self._idle_task_count_by_load = SortedDict()
+        self._idle_task_count_load = {}
         self.n_tasks = 0
         self.resources = resources
         self.saturated = set()
@@ -1742,6 +1836,10 @@ class SchedulerState:
         self.workers = workers
         self._task_prefix_count_global = defaultdict(int)
         self._network_occ_global = 0.0
+        self._validation_touched = None
+        self._speculative = {}
+        self.result_cache = None
+        self.fair_share = None
         self.running = {
             ws for ws in self.workers.values() if ws.status == Status.running
         }
@@ -1750,11 +1848,16 @@ class SchedulerState:
         self.transition_log = deque(
             maxlen=dask.config.get("distributed.admin.low-level-log-length")
         )
+        self.transition_log_keys = set()
+        self.transition_log_prefixes = set()
         self.transition_counter = 0
         self._idle_transition_counter = 0
         self.transition_counter_max = transition_counter_max
 
         # Variables from dask.config, cached by __init__ for performance
+        self.TRANSITION_LOG_SAMPLING = dask.config.get(
+            "distributed.scheduler.transition-log-sampling"
+        )
         self.UNKNOWN_TASK_DURATION = parse_timedelta(
             dask.config.get("distributed.scheduler.unknown-task-duration")
         )
@@ -1775,6 +1878,8 @@ class SchedulerState:
             / 2.0
         )
 
+        self.MEMORY_TARGET = dask.config.get("distributed.worker.memory.target")
+
         self.WORKER_SATURATION = dask.config.get(
             "distributed.scheduler.worker-saturation"
         )
@@ -1790,6 +1895,9 @@ class SchedulerState:
                 "`distributed.scheduler.worker-saturation` must be a float > 0; got "
                 + repr(self.WORKER_SATURATION)
             )
+        self.CO_ASSIGN_SIBLINGS = dask.config.get(
+            "distributed.scheduler.co-assign-siblings"
+        )
 
     @property
     def memory(self) -> MemoryState:
@@ -1948,6 +2056,10 @@ class SchedulerState:
             recommendations: Recs = {}
             worker_msgs: Msgs = {}
             client_msgs: Msgs = {}
+            # Duration of this transition, including any intermediate transition to
+            # released and the plugins
+            metric = ("transition", start, finish, "seconds")
+            transition_start = time()
 
             if self.plugins:
                 dependents = set(ts.dependents)
@@ -1989,15 +2101,30 @@ class SchedulerState:
                     f"{stimulus_id=}, {kwargs=}, story={self.story(ts)}"
                 )
 
+            if self._speculative and ts._state != "processing":
+                # The original attempt won, or the task was released or erred;
+                # cancel the duplicate
+                speculative = self._speculative.pop(key, None)
+                if speculative is not None:
+                    worker_msgs.setdefault(speculative[0].address, []).append(
+                        {"op": "free-keys", "keys": [key], "stimulus_id": stimulus_id}
+                    )
+
             if not stimulus_id:
                 stimulus_id = STIMULUS_ID_UNSET
 
             actual_finish = ts._state
-            self.transition_log.append(
-                Transition(
-                    key, start, actual_finish, recommendations, stimulus_id, time()
+            if (
+                self.TRANSITION_LOG_SAMPLING >= 1
+                or key in self.transition_log_keys
+                or ts.prefix.name in self.transition_log_prefixes
+                or hash(key) % 65536 < self.TRANSITION_LOG_SAMPLING * 65536
+            ):
+                self.transition_log.append(
+                    Transition(
+                        key, start, actual_finish, recommendations, stimulus_id, time()
+                    )
                 )
-            )
             if self.validate:
                 if stimulus_id == STIMULUS_ID_UNSET:
                     raise RuntimeError(
@@ -2017,13 +2144,17 @@ class SchedulerState:
                     ts.dependents = dependents
                     ts.dependencies = dependencies
                     self.tasks[ts.key] = ts
-                for plugin in list(self.plugins.values()):
+                for name, plugin in list(self.plugins.items()):
+                    plugin_start = time()
                     try:
                         plugin.transition(
                             key, start, actual_finish, stimulus_id=stimulus_id, **kwargs
                         )
                     except Exception:
                         logger.info("Plugin failed with exception", exc_info=True)
+                    self.digest_metric(
+                        ("plugin", name, "transition", "seconds"), time() - plugin_start
+                    )
                 if ts.state == "forgotten":
                     del self.tasks[ts.key]
 
@@ -2034,6 +2165,7 @@ class SchedulerState:
                     ts.prefix.groups.remove(tg)
                     del self.task_groups[tg.name]
 
+            self.digest_metric(metric, time() - transition_start)
             return recommendations, client_msgs, worker_msgs
         except Exception:
             logger.exception("Error transitioning %r from %r to %r", key, start, finish)
@@ -2070,6 +2202,15 @@ class SchedulerState:
             for w, new_msgs in new_wmsgs.items():
                 worker_msgs.setdefault(w, []).extend(new_msgs)
 
+        # Releasing or forgetting many keys at once generates one message per key
+        for msgs_dict in (client_msgs, worker_msgs):
+            for addr, msgs in msgs_dict.items():
+                if len(msgs) > 1:
+                    msgs_dict[addr] = _coalesce_msgs(msgs)
+
+        if self._validation_touched is not None:
+            self._validation_touched.update(keys)
+
         if self.validate:
             # FIXME downcast antipattern
             scheduler = cast(Scheduler, self)
@@ -2193,7 +2334,9 @@ class SchedulerState:
 
         return ws
 
-    def decide_worker_rootish_queuing_enabled(self) -> WorkerState | None:
+    def decide_worker_rootish_queuing_enabled(
+        self, ts: TaskState | None = None
+    ) -> WorkerState | None:
         """Pick a worker for a runnable root-ish task, if not all are busy.
 
         Picks the least-busy worker out of the ``idle`` workers (idle workers have fewer
@@ -2206,9 +2349,16 @@ class SchedulerState:
         up. This ensures that downstream tasks always run before new root tasks are
         started.
 
-        This does not try to schedule sibling tasks on the same worker; in fact, it
-        usually does the opposite. Even though this increases subsequent data transfer,
-        it typically reduces overall memory use by eliminating root task overproduction.
+        By default, this does not try to schedule sibling tasks on the same worker; in
+        fact, it usually does the opposite. Even though this increases subsequent data
+        transfer, it typically reduces overall memory use by eliminating root task
+        overproduction.
+
+        If ``distributed.scheduler.co-assign-siblings`` is enabled and ``ts`` is
+        given, ``ts`` is instead sent to the worker that received the previous task of
+        its group if the two tasks feed the same downstream task (see
+        :func:`_reduction_targets`). That worker may be oversaturated by one task, so
+        that siblings aren't split whenever a single slot opens up.
 
         Returns
         -------
@@ -2229,19 +2379,53 @@ class SchedulerState:
             # All workers busy? Task gets/stays queued.
             return None
 
-        # Just pick the least busy worker.
-        # NOTE: this will lead to worst-case scheduling with regards to co-assignment.
-        ws = min(
-            self.idle_task_count,
-            key=lambda ws: len(ws.processing) / ws.nthreads,
-        )
+        ws = lws = None
+        tg = ts.group if ts is not None and self.CO_ASSIGN_SIBLINGS else None
+        if tg is not None:
+            assert ts is not None
+            targets = _reduction_targets(ts)
+            lws = tg.last_worker
+            if (
+                lws is not None
+                and lws in self.running
+                and self.workers.get(lws.address) is lws
+                and not targets.isdisjoint(tg.last_worker_targets)
+                # Allow oversaturating by one task, so that siblings are not split
+                # whenever their worker only had a single slot left
+                and _task_slots_available(lws, self.WORKER_SATURATION) >= 0
+            ):
+                ws = lws
+            else:
+                lws = None
+
+        if ws is None:
+            # Just pick the least busy worker.
+            # NOTE: unless co-assign-siblings is enabled, this will lead to
+            # worst-case scheduling with regards to co-assignment.
+            _, ws = self._idle_task_count_by_load.peekitem(0)  # type: ignore[attr-defined]
+            if self.validate:
+                assert self._idle_task_count_load[ws][0] == min(
+                    _idle_task_load(ws) for ws in self.idle_task_count
+                )
+
+        if tg is not None:
+            # Record `last_worker`, or clear it on the final task
+            if tg.states["queued"] + tg.states["released"] + tg.states["waiting"] > 1:
+                tg.last_worker = ws
+                tg.last_worker_targets = targets
+            else:
+                tg.last_worker = None
+                tg.last_worker_targets = set()
+
         if self.validate:
             assert self.workers.get(ws.address) is ws
-            assert not _worker_full(ws, self.WORKER_SATURATION), (
-                ws,
-                _task_slots_available(ws, self.WORKER_SATURATION),
-            )
             assert ws in self.running, (ws, self.running)
+            if ws is not lws:
+                assert ws in self.idle_task_count
+                assert not _worker_full(ws, self.WORKER_SATURATION), (
+                    ws,
+                    _task_slots_available(ws, self.WORKER_SATURATION),
+                )
 
         return ws
 
@@ -2274,7 +2458,7 @@ class SchedulerState:
                 ts,
                 self.running,
                 valid_workers,
-                partial(self.worker_objective, ts),
+                self.worker_objective_for(ts),
             )
         else:
             # TODO if `is_rootish` would always return True for tasks without
@@ -2328,7 +2512,7 @@ class SchedulerState:
                 if not (ws := self.decide_worker_rootish_queuing_disabled(ts)):
                     return {ts.key: "no-worker"}, {}, {}
             else:
-                if not (ws := self.decide_worker_rootish_queuing_enabled()):
+                if not (ws := self.decide_worker_rootish_queuing_enabled(ts)):
                     return {ts.key: "queued"}, {}, {}
         else:
             if not (ws := self.decide_worker_non_rootish(ts)):
@@ -2414,6 +2598,8 @@ class SchedulerState:
                     start=startstop["start"],
                     action=startstop["action"],
                 )
+            if self.fair_share is not None:
+                self.fair_share.finished(ts, startstops)
 
         s = self.unknown_durations.pop(ts.prefix.name, set())
         steal = self.extensions.get("stealing")
@@ -2479,12 +2665,17 @@ class SchedulerState:
 
         ts.state = "released"
 
+        # Don't recompute lost results that were only kept around for reuse
+        uncached = self.result_cache is not None and self.result_cache.discard(ts)
+
         report_msg = {"op": "lost-data", "key": key}
         for cs in ts.who_wants or ():
             client_msgs[cs.client_key] = [report_msg]
 
         if not ts.run_spec:  # pure data
             recommendations[key] = "forgotten"
+        elif uncached and not ts.who_wants and not ts.dependents:
+            recommendations[key] = "forgotten"
         elif ts.has_lost_dependencies:
             recommendations[key] = "forgotten"
         elif (ts.who_wants or ts.waiters) and not any(
@@ -2802,7 +2993,7 @@ class SchedulerState:
             assert not ts.actor, f"Actors can't be queued: {ts}"
             assert ts in self.queued
 
-        if ws := self.decide_worker_rootish_queuing_enabled():
+        if ws := self.decide_worker_rootish_queuing_enabled(ts):
             self.queued.discard(ts)
             return self._add_to_processing(ts, ws, stimulus_id=stimulus_id)
         # If no worker, task just stays `queued`
@@ -2812,6 +3003,10 @@ class SchedulerState:
         ts = self.tasks.pop(key)
         assert ts.state == "forgotten"
         self.unrunnable.discard(ts)
+        if self.result_cache is not None:
+            self.result_cache.discard(ts)
+        if self.fair_share is not None:
+            self.fair_share.forget(ts)
         for cs in ts.who_wants or ():
             cs.wants_what.remove(ts)
         ts.who_wants = None
@@ -2913,6 +3108,9 @@ class SchedulerState:
         ("released", "erred"): _transition_released_erred,
     }
 
+    def digest_metric(self, name: Hashable, value: float) -> None:
+        """Log an arbitrary numerical metric. Implemented by Scheduler."""
+
     def story(
         self, *keys_or_tasks_or_stimuli: Key | TaskState | str
     ) -> list[Transition]:
@@ -2923,6 +3121,27 @@ class SchedulerState:
         }
         return scheduler_story(keys_or_stimuli, self.transition_log)
 
+    def start_recording_transitions(
+        self, keys: Iterable[Key] = (), prefixes: Iterable[str] = ()
+    ) -> None:
+        """Always record the transitions of the given keys and of all tasks with the
+        given prefix names in the transition log, which backs :meth:`story`, even if
+        ``distributed.scheduler.transition-log-sampling`` would skip them.
+
+        See also
+        --------
+        stop_recording_transitions
+        """
+        self.transition_log_keys.update(keys)
+        self.transition_log_prefixes.update(prefixes)
+
+    def stop_recording_transitions(
+        self, keys: Iterable[Key] = (), prefixes: Iterable[str] = ()
+    ) -> None:
+        """Revert :meth:`start_recording_transitions`"""
+        self.transition_log_keys.difference_update(keys)
+        self.transition_log_prefixes.difference_update(prefixes)
+
     ##############################
     # Assigning Tasks to Workers #
     ##############################
@@ -2990,10 +3209,31 @@ class SchedulerState:
                 if 0.4 < pending > 1.9 * (self.total_occupancy / self.total_nthreads):
                     self.saturated.add(ws)
 
-        if not _worker_full(ws, self.WORKER_SATURATION) and ws.status == Status.running:
+        self._set_idle_task_count(
+            ws,
+            not _worker_full(ws, self.WORKER_SATURATION)
+            and ws.status == Status.running,
+        )
+
+    def _set_idle_task_count(self, ws: WorkerState, idle: bool) -> None:
+        """Add or remove a worker to/from ``idle_task_count`` and update its position
+        in the index of idle workers by load
+        """
+        old_key = self._idle_task_count_load.get(ws)
+        if idle:
             self.idle_task_count.add(ws)
+            key = (_idle_task_load(ws), ws.address)
+            if key == old_key:
+                return
+            if old_key is not None:
+                del self._idle_task_count_by_load[old_key]
+            self._idle_task_count_by_load[key] = ws
+            self._idle_task_count_load[ws] = key
         else:
             self.idle_task_count.discard(ws)
+            if old_key is not None:
+                del self._idle_task_count_by_load[old_key]
+                del self._idle_task_count_load[ws]
 
     def is_unoccupied(
         self, ws: WorkerState, occupancy: float, nprocessing: int
@@ -3132,19 +3372,70 @@ class SchedulerState:
     def worker_objective(self, ts: TaskState, ws: WorkerState) -> tuple:
         """Objective function to determine which worker should get the task
 
-        Minimize expected start time.  If a tie then break with data storage.
+        Avoid workers that would be pushed past their target memory, then minimize
+        expected start time.  If a tie then break with data storage.
         """
         comm_bytes = sum(
             dts.get_nbytes() for dts in ts.dependencies if ws not in (dts.who_has or ())
         )
+        return self._worker_objective(ts, ws, comm_bytes)
+
+    def worker_objective_for(self, ts: TaskState) -> Callable[[WorkerState], tuple]:
+        """Equivalent to ``partial(self.worker_objective, ts)``, for when the
+        objective is evaluated against many candidate workers
+
+        :meth:`worker_objective` iterates over all the dependencies of ``ts`` for
+        every candidate, which is O(dependencies * candidates) for wide fan-ins.
+        Instead, this indexes the bytes of the dependencies held by each worker
+        once, in O(sum of replicas of the dependencies), after which each
+        evaluation of the objective is O(1).
+        """
+        total_nbytes = 0
+        held_nbytes: defaultdict[WorkerState, int] = defaultdict(int)
+        for dts in ts.dependencies:
+            nbytes = dts.get_nbytes()
+            total_nbytes += nbytes
+            for ws in dts.who_has or ():
+                held_nbytes[ws] += nbytes
+
+        def objective(ws: WorkerState) -> tuple:
+            comm_bytes = total_nbytes - held_nbytes.get(ws, 0)
+            return self._worker_objective(ts, ws, comm_bytes)
 
+        return objective
+
+    def _worker_objective(
+        self, ts: TaskState, ws: WorkerState, comm_bytes: int
+    ) -> tuple:
         stack_time = ws.occupancy / ws.nthreads
         start_time = stack_time + comm_bytes / self.bandwidth
 
         if ts.actor:
             return (len(ws.actors), start_time, ws.nbytes)
         else:
-            return (start_time, ws.nbytes)
+            return (
+                self._exceeds_memory_target(ts, ws, comm_bytes),
+                start_time,
+                ws.nbytes,
+            )
+
+    def _exceeds_memory_target(
+        self, ts: TaskState, ws: WorkerState, comm_bytes: int
+    ) -> bool:
+        """Whether running ``ts`` on ``ws`` is predicted to push the worker's
+        optimistic memory past ``distributed.worker.memory.target``, counting the
+        dependencies it would need to fetch and the output size predicted from the
+        task's prefix
+        """
+        if not self.MEMORY_TARGET or not ws.memory_limit:
+            return False
+        # Same as ws.memory.optimistic, without building a MemoryState for every
+        # candidate worker
+        metrics = ws.metrics
+        managed = max(0, ws.nbytes - metrics["spilled_bytes"]["memory"])
+        optimistic = min(metrics["memory"], managed + ws._memory_unmanaged_old)
+        nbytes = comm_bytes + max(ts.prefix.nbytes_average, 0)
+        return optimistic + nbytes > self.MEMORY_TARGET * ws.memory_limit
 
     def add_replica(self, ts: TaskState, ws: WorkerState) -> None:
         """Note that a worker holds a replica of a task with state='memory'"""
@@ -3174,12 +3465,22 @@ class SchedulerState:
     def bulk_schedule_unrunnable_after_adding_worker(self, ws: WorkerState) -> Recs:
         """Send ``no-worker`` tasks to ``processing`` that this worker can handle.
 
+        Returns priority-ordered recommendations.
+        """
+        return self.bulk_schedule_unrunnable_after_adding_workers({ws})
+
+    def bulk_schedule_unrunnable_after_adding_workers(
+        self, workers: set[WorkerState]
+    ) -> Recs:
+        """Send ``no-worker`` tasks to ``processing`` that any of these workers can
+        handle.
+
         Returns priority-ordered recommendations.
         """
         runnable: list[TaskState] = []
         for ts in self.unrunnable:
             valid = self.valid_workers(ts)
-            if valid is None or ws in valid:
+            if valid is None or not valid.isdisjoint(workers):
                 runnable.append(ts)
 
         # Recommendations are processed LIFO, hence the reversed order
@@ -3212,6 +3513,8 @@ class SchedulerState:
         self.acquire_resources(ts, ws)
         self.check_idle_saturated(ws)
         self.n_tasks += 1
+        if self.fair_share is not None:
+            self.fair_share.started(ts)
 
         if ts.actor:
             ws.actors.add(ts)
@@ -3368,23 +3671,27 @@ class SchedulerState:
         for dts in ts.dependents:
             dts.has_lost_dependencies = True
             dts.dependencies.remove(ts)
+            if not dts.dependencies:
+                dts.dependencies = _NO_TASKS
             if dts.waiting_on:
                 dts.waiting_on.discard(ts)
             if dts.state not in ("memory", "erred"):
                 # Cannot compute task anymore
                 recommendations[dts.key] = "forgotten"
-        ts.dependents.clear()
+        ts.dependents = _NO_TASKS
         ts.waiters = None
 
         for dts in ts.dependencies:
             dts.dependents.remove(ts)
             if dts.waiters:
                 dts.waiters.discard(ts)
-            if not dts.dependents and not dts.who_wants:
-                # Task not needed anymore
-                assert dts is not ts
-                recommendations[dts.key] = "forgotten"
-        ts.dependencies.clear()
+            if not dts.dependents:
+                dts.dependents = _NO_TASKS
+                if not dts.who_wants:
+                    # Task not needed anymore
+                    assert dts is not ts
+                    recommendations[dts.key] = "forgotten"
+        ts.dependencies = _NO_TASKS
         ts.waiting_on = None
 
         for ws in ts.who_has or ():
@@ -3413,6 +3720,10 @@ class SchedulerState:
                 if ts.who_wants:
                     ts.who_wants.remove(cs)
                 if not ts.who_wants:
+                    if self.result_cache is not None and self.result_cache.retain(
+                        ts, cs, recommendations
+                    ):
+                        continue
                     if not ts.dependents:
                         # No live dependents, can forget
                         recommendations[ts.key] = "forgotten"
@@ -3528,6 +3839,7 @@ class Scheduler(SchedulerState, ServerNode):
     """
 
     default_port = 8786
+    digest_stream_handlers = True
     _instances: ClassVar[weakref.WeakSet[Scheduler]] = weakref.WeakSet()
 
     worker_ttl: float | None
@@ -3535,6 +3847,19 @@ class Scheduler(SchedulerState, ServerNode):
     idle_timeout: float | None
     _no_workers_since: float | None  # Note: not None iff there are pending tasks
     no_workers_timeout: float | None
+    #: Workers whose connection dropped and that are about to be removed together
+    _disconnected_workers: set[str]
+    #: Set once the workers in ``_disconnected_workers`` have been removed, or None
+    #: if no worker is waiting to be removed
+    _disconnected_workers_removed: asyncio.Event | None
+    worker_registration_window: float
+    #: Workers that joined within the current registration window
+    _workers_to_schedule: set[WorkerState]
+    #: distributed.scheduler.speculative-execution.multiplier
+    speculation_multiplier: float | None
+    #: Runs :meth:`validate_state_offloaded`, so that it doesn't hold up other
+    #: offloaded work such as deserializing graphs
+    _validation_executor: ThreadPoolExecutor | None
 
     def __init__(
         self,
@@ -3609,6 +3934,10 @@ class Scheduler(SchedulerState, ServerNode):
             dask.config.get("distributed.scheduler.no-workers-timeout")
         )
         self._no_workers_since = None
+        self.worker_registration_window = parse_timedelta(
+            dask.config.get("distributed.scheduler.worker-registration-window")
+        )
+        self._workers_to_schedule = set()
 
         self.time_started = self.idle_since  # compatibility for dask-gateway
         self._replica_lock = RLock()
@@ -3726,6 +4055,8 @@ class Scheduler(SchedulerState, ServerNode):
         # Communication state
         self.client_comms = {}
         self.stream_comms = {}
+        self._disconnected_workers = set()
+        self._disconnected_workers_removed = None
 
         # Task state
         tasks = {}
@@ -3851,6 +4182,7 @@ class Scheduler(SchedulerState, ServerNode):
             "benchmark_hardware": self.benchmark_hardware,
             "get_story": self.get_story,
             "check_idle": self.check_idle,
+            "validate_state_offloaded": self.validate_state_offloaded,
         }
 
         connection_limit = get_fileno_limit() / 2
@@ -3889,6 +4221,40 @@ class Scheduler(SchedulerState, ServerNode):
         pc = PeriodicCallback(self._check_no_workers, 250)
         self.periodic_callbacks["no-workers-timeout"] = pc
 
+        self.speculation_multiplier = dask.config.get(
+            "distributed.scheduler.speculative-execution.multiplier"
+        )
+        pc = PeriodicCallback(
+            self.check_stragglers,
+            parse_timedelta(
+                dask.config.get("distributed.scheduler.speculative-execution.interval")
+            )
+            * 1000,
+        )
+        self.periodic_callbacks["speculative-execution"] = pc
+
+        validation_interval = dask.config.get(
+            "distributed.scheduler.validation-interval"
+        )
+        if validation_interval is not None:
+            self._validation_touched = set()
+            pc = PeriodicCallback(
+                self.validate_touched,
+                parse_timedelta(validation_interval, default="ms") * 1000,
+            )
+            self.periodic_callbacks["validate-touched"] = pc
+
+        full_validation_interval = dask.config.get(
+            "distributed.scheduler.full-validation-interval"
+        )
+        if full_validation_interval is not None:
+            pc = PeriodicCallback(
+                self.validate_state_offloaded,
+                parse_timedelta(full_validation_interval, default="ms") * 1000,
+            )
+            self.periodic_callbacks["validate-offloaded"] = pc
+        self._validation_executor = None
+
         if extensions is None:
             extensions = DEFAULT_EXTENSIONS.copy()
             if not dask.config.get("distributed.scheduler.work-stealing"):
@@ -3936,6 +4302,10 @@ class Scheduler(SchedulerState, ServerNode):
         }
         return d
 
+    def digest_metric(self, name: Hashable, value: float) -> None:
+        """Implement SchedulerState.digest_metric by calling Server.digest_metric"""
+        ServerNode.digest_metric(self, name, value)
+
     def _to_dict(self, *, exclude: Container[str] = ()) -> dict:
         """Dictionary representation for debugging purposes.
         Not type stable and not intended for roundtrips.
@@ -4155,6 +4525,8 @@ class Scheduler(SchedulerState, ServerNode):
         for pc in self.periodic_callbacks.values():
             pc.stop()
         self.periodic_callbacks.clear()
+        if self._validation_executor is not None:
+            self._validation_executor.shutdown(wait=False)
 
         self.stop_services()
 
@@ -4205,6 +4577,7 @@ class Scheduler(SchedulerState, ServerNode):
         resources: dict[str, float] | None = None,
         host_info: dict | None = None,
         metrics: dict,
+        metrics_delta: bool = False,
         executing: dict[Key, float] | None = None,
         extensions: dict | None = None,
     ) -> dict[str, Any]:
@@ -4215,6 +4588,10 @@ class Scheduler(SchedulerState, ServerNode):
             logger.warning(f"Received heartbeat from unregistered worker {address!r}.")
             return {"status": "missing"}
 
+        if metrics_delta:
+            # Only the metrics that changed since the last acknowledged heartbeat
+            metrics = {**ws.metrics, **metrics}
+
         host = get_address_host(address)
         local_now = time()
         host_info = host_info or {}
@@ -4303,9 +4680,18 @@ class Scheduler(SchedulerState, ServerNode):
         return {
             "status": "OK",
             "time": local_now,
-            "heartbeat-interval": heartbeat_interval(len(self.workers)),
+            "heartbeat-interval": self._heartbeat_interval(),
         }
 
+    def _heartbeat_interval(self) -> float:
+        """Interval in seconds that we desire heartbeats, based on the number of
+        workers and stretched while the event loop is lagging behind
+        """
+        lag = self._tick_interval_observed / self._tick_interval
+        return heartbeat_interval(len(self.workers)) * min(
+            max(lag, 1), HEARTBEAT_MAX_SLOWDOWN
+        )
+
     @log_errors
     async def add_worker(
         self,
@@ -4416,17 +4802,14 @@ class Scheduler(SchedulerState, ServerNode):
             logger.exception(exc, exc_info=exc)
 
         if ws.status == Status.running:
-            self.transitions(
-                self.bulk_schedule_unrunnable_after_adding_worker(ws), stimulus_id
-            )
-            self.stimulus_queue_slots_maybe_opened(stimulus_id=stimulus_id)
+            self._schedule_on_running_worker(ws, stimulus_id)
 
         logger.info("Register worker %s", ws)
 
         msg = {
             "status": "OK",
             "time": time(),
-            "heartbeat-interval": heartbeat_interval(len(self.workers)),
+            "heartbeat-interval": self._heartbeat_interval(),
             "worker-plugins": self.worker_plugins,
         }
 
@@ -4442,6 +4825,42 @@ class Scheduler(SchedulerState, ServerNode):
         # This will keep running until the worker is removed
         await self.handle_worker(comm, address)
 
+    def _schedule_on_running_worker(self, ws: WorkerState, stimulus_id: str) -> None:
+        """Reschedule unrunnable and queued tasks after a worker joined the cluster
+        or resumed running.
+
+        If ``distributed.scheduler.worker-registration-window`` is set, this is done
+        at the end of the window, once for all the workers that started running
+        within it.
+        """
+        if not self.worker_registration_window:
+            self.transitions(
+                self.bulk_schedule_unrunnable_after_adding_worker(ws), stimulus_id
+            )
+            self.stimulus_queue_slots_maybe_opened(stimulus_id=stimulus_id)
+            return
+
+        if not self._workers_to_schedule:
+            self._ongoing_background_tasks.call_later(
+                self.worker_registration_window, self._schedule_after_adding_workers
+            )
+        self._workers_to_schedule.add(ws)
+
+    async def _schedule_after_adding_workers(self) -> None:
+        workers = {
+            ws
+            for ws in self._workers_to_schedule
+            if ws.status == Status.running and self.workers.get(ws.address) is ws
+        }
+        self._workers_to_schedule = set()
+        if not workers:
+            return
+        stimulus_id = f"add-workers-{time()}"
+        self.transitions(
+            self.bulk_schedule_unrunnable_after_adding_workers(workers), stimulus_id
+        )
+        self.stimulus_queue_slots_maybe_opened(stimulus_id=stimulus_id)
+
     async def add_nanny(self, comm: Comm, address: str) -> None:
         async with self._starting_nannies_cond:
             self._starting_nannies.add(address)
@@ -4587,8 +5006,11 @@ class Scheduler(SchedulerState, ServerNode):
             fifo_timeout=fifo_timeout,
             start=start,
             tasks=runnable,
+            client=client,
         )
 
+        if self.result_cache is not None:
+            self.result_cache.lookup(keys)
         self.client_desires_keys(keys=keys, client=client)
 
         # Add actors
@@ -4640,7 +5062,8 @@ class Scheduler(SchedulerState, ServerNode):
             else:
                 annotations_for_plugin.pop("span", None)
 
-        for plugin in list(self.plugins.values()):
+        for name, plugin in list(self.plugins.items()):
+            plugin_start = time()
             try:
                 plugin.update_graph(
                     self,
@@ -4653,6 +5076,9 @@ class Scheduler(SchedulerState, ServerNode):
                 )
             except Exception as e:
                 logger.exception(e)
+            self.digest_metric(
+                ("plugin", name, "update_graph", "seconds"), time() - plugin_start
+            )
 
         self.transitions(recommendations, stimulus_id)
 
@@ -4681,40 +5107,26 @@ class Scheduler(SchedulerState, ServerNode):
             annotations = annotations.data  # type: ignore[unreachable]
         start = time()
         try:
-            try:
-                graph = deserialize(graph_header, graph_frames).data
-                del graph_header, graph_frames
-            except Exception as e:
-                msg = """\
-                    Error during deserialization of the task graph. This frequently
-                    occurs if the Scheduler and Client have different environments.
-                    For more information, see
-                    https://docs.dask.org/en/stable/deployment-considerations.html#consistent-software-environments
-                """
-                raise RuntimeError(textwrap.dedent(msg)) from e
+            # Everything that doesn't touch the scheduler state runs in the
+            # offload thread, so that large submissions don't block the event
+            # loop. Only the creation of the TaskStates happens on the loop.
             (
                 dsk,
                 dependencies,
                 annotations_by_type,
+                internal_priority,
+                durations,
             ) = await offload(
-                _materialize_graph,
-                graph=graph,
+                _prepare_graph,
+                graph_header=graph_header,
+                graph_frames=graph_frames,
                 global_annotations=annotations or {},
+                internal_priority=internal_priority,
             )
-            del graph
-            if not internal_priority:
-                # Removing all non-local keys before calling order()
-                dsk_keys = set(
-                    dsk
-                )  # intersection() of sets is much faster than dict_keys
-                stripped_deps = {
-                    k: v.intersection(dsk_keys)
-                    for k, v in dependencies.items()
-                    if k in dsk_keys
-                }
-                internal_priority = await offload(
-                    dask.order.order, dsk=dsk, dependencies=stripped_deps
-                )
+            del graph_header, graph_frames
+            for phase, duration in durations.items():
+                self.digest_metric(f"update-graph-{phase}-duration", duration)
+            phase_start = time()
 
             self._create_taskstate_from_graph(
                 dsk=dsk,
@@ -4734,6 +5146,9 @@ class Scheduler(SchedulerState, ServerNode):
                 start=start,
                 stimulus_id=stimulus_id or f"update-graph-{start}",
             )
+            self.digest_metric(
+                "update-graph-taskstates-duration", time() - phase_start
+            )
         except RuntimeError as e:
             logger.error(str(e))
             err = error_message(e)
@@ -4941,21 +5356,26 @@ class Scheduler(SchedulerState, ServerNode):
         fifo_timeout: int | float | str,
         start: float,
         tasks: list[TaskState],
+        client: str | None = None,
     ) -> None:
         fifo_timeout = parse_timedelta(fifo_timeout)
-        if submitting_task:  # sub-tasks get better priority than parent tasks
-            sts = self.tasks.get(submitting_task)
-            if sts is not None:
-                assert sts.priority
-                generation = sts.priority[0] - 0.01
-            else:  # super-task already cleaned up
-                generation = self.generation
-        elif self._last_time + fifo_timeout < start:
-            self.generation += 1  # older graph generations take precedence
-            generation = self.generation
-            self._last_time = start
+        fair_share_tags: dict[Key, float] | None = None
+        sts = self.tasks.get(submitting_task) if submitting_task else None
+        if sts is not None:  # sub-tasks get better priority than parent tasks
+            assert sts.priority
+            generation = sts.priority[0] - 0.01
         else:
+            # A super-task that was already cleaned up starts no new generation
+            if not submitting_task and self._last_time + fifo_timeout < start:
+                self.generation += 1  # older graph generations take precedence
+                self._last_time = start
             generation = self.generation
+            if self.fair_share is not None:
+                # Virtual time tags replace the generation. The generation keeps
+                # advancing regardless, so that it doesn't depend on the extension.
+                fair_share_tags = self.fair_share.tag(
+                    tasks, internal_priority, client, start, fifo_timeout
+                )
 
         for ts in tasks:
             if isinstance(user_priority, dict):
@@ -4973,7 +5393,11 @@ class Scheduler(SchedulerState, ServerNode):
             if not ts.priority and ts.key in internal_priority:
                 ts.priority = (
                     -annotated_prio,
-                    generation,
+                    (
+                        fair_share_tags[ts.key]
+                        if fair_share_tags is not None
+                        else generation
+                    ),
                     internal_priority[ts.key],
                 )
 
@@ -4997,32 +5421,47 @@ class Scheduler(SchedulerState, ServerNode):
 
         Must be called after `check_idle_saturated`; i.e. `idle_task_count` must be up to date.
         """
-        if not self.queued:
-            return
-        slots_available = sum(
-            _task_slots_available(ws, self.WORKER_SATURATION)
-            for ws in self.idle_task_count
-        )
-        if slots_available == 0:
-            return
+        start = time()
+        transitioned = False
+        while self.queued:
+            slots_available = sum(
+                _task_slots_available(ws, self.WORKER_SATURATION)
+                for ws in self.idle_task_count
+            )
+            if slots_available == 0:
+                break
 
-        for _ in range(slots_available):
-            if not self.queued:
-                return
-            # Ideally, we'd be popping it here already but this would break
-            # certain state invariants since the task is not transitioned, yet
-            qts = self.queued.peek()
+            # Tasks are transitioned by a single _transitions pass, whose
+            # recommendations are processed last-in-first-out; insert them by
+            # decreasing priority so that the first task in the queue is the first one
+            # to be assigned a worker. All compute-task messages are then sent at once.
+            # Ideally, we'd be popping them here already but this would break
+            # certain state invariants since the tasks are not transitioned, yet
+            qtss = list(self.queued.peekn(slots_available))
+            recommendations: Recs = {}
+            for qts in reversed(qtss):
+                if self.validate:
+                    assert qts.state == "queued", qts.state
+                    assert not qts.processing_on, (qts, qts.processing_on)
+                    assert not qts.waiting_on, (qts, qts.processing_on)
+                    assert qts.who_wants or qts.waiters, qts
+                recommendations[qts.key] = "processing"
+
+            # This removes the tasks from the top of the self.queued heap
+            self.transitions(recommendations, stimulus_id)
             if self.validate:
-                assert qts.state == "queued", qts.state
-                assert not qts.processing_on, (qts, qts.processing_on)
-                assert not qts.waiting_on, (qts, qts.processing_on)
-                assert qts.who_wants or qts.waiters, qts
+                for qts in qtss:
+                    assert qts.state == "processing", qts.state
+                    assert qts not in self.queued
+            transitioned = True
+
+            # With co-assignment, some tasks may have been assigned to a worker with
+            # no free slots, leaving slots open elsewhere; fill them as well
+            if not self.CO_ASSIGN_SIBLINGS:
+                break
 
-            # This removes the task from the top of the self.queued heap
-            self.transitions({qts.key: "processing"}, stimulus_id)
-            if self.validate:
-                assert qts.state == "processing"
-                assert not self.queued or self.queued.peek() != qts
+        if transitioned:
+            self.digest_metric("queued-slots-opened-duration", time() - start)
 
     def stimulus_task_finished(
         self, key: Key, worker: str, stimulus_id: str, run_id: int, **kwargs: Any
@@ -5064,6 +5503,18 @@ class Scheduler(SchedulerState, ServerNode):
                     "stimulus_id": stimulus_id,
                 }
             ]
+        elif (
+            ts.state == "processing"
+            and (speculative := self._speculative.get(key)) is not None
+            and speculative[1] == run_id
+        ):
+            # The duplicate started by check_stragglers finished first
+            worker_msgs = self._accept_speculative(ts, stimulus_id)
+            recommendations, client_msgs, msgs = self.stimulus_task_finished(
+                key, worker, stimulus_id, run_id, **kwargs
+            )
+            for w, new_msgs in msgs.items():
+                worker_msgs.setdefault(w, []).extend(new_msgs)
         elif ts.run_id != run_id:
             if not ts.processing_on or ts.processing_on.address != worker:
                 logger.debug(
@@ -5113,6 +5564,24 @@ class Scheduler(SchedulerState, ServerNode):
         if ts.run_id != run_id:
             if ts.processing_on and ts.processing_on.address == worker:
                 return self._transition(key, "released", stimulus_id)
+            speculative = self._speculative.get(key)
+            if speculative is not None and speculative[1] == run_id:
+                # The duplicate started by check_stragglers failed; let the original
+                # attempt carry on
+                self._speculative[key] = None
+                return (
+                    {},
+                    {},
+                    {
+                        worker: [
+                            {
+                                "op": "free-keys",
+                                "keys": [key],
+                                "stimulus_id": stimulus_id,
+                            }
+                        ]
+                    },
+                )
             return {}, {}, {}
 
         if ts.retries > 0:
@@ -5189,6 +5658,7 @@ class Scheduler(SchedulerState, ServerNode):
 
         See also
         --------
+        remove_workers
         retire_workers
         close_worker
         """
@@ -5196,134 +5666,155 @@ class Scheduler(SchedulerState, ServerNode):
             return "already-removed"
 
         address = self.coerce_address(address)
+        out = await self.remove_workers(
+            [address], stimulus_id=stimulus_id, safe=safe, close=close
+        )
+        return out[address]
 
-        if address not in self.workers:
-            return "already-removed"
-
-        host = get_address_host(address)
-
-        ws = self.workers[address]
-
-        logger.info(f"Remove worker {ws} ({stimulus_id=})")
-        if close:
-            with suppress(AttributeError, CommClosedError):
-                self.stream_comms[address].send(
-                    {"op": "close", "reason": "scheduler-remove-worker"}
-                )
+    @log_errors
+    async def remove_workers(
+        self,
+        addresses: Collection[str],
+        *,
+        stimulus_id: str,
+        safe: bool = False,
+        close: bool = True,
+    ) -> dict[str, Literal["OK", "already-removed"]]:
+        """Remove many workers from the cluster at once.
 
-        self.remove_resources(address)
+        This is equivalent to calling :meth:`remove_worker` on each of them, but
+        all workers are taken out of the cluster before their tasks are
+        rescheduled in a single transitions pass, so that no task is sent to a
+        worker that is about to be removed as well.
 
-        dh = self.host_info[host]
-        dh_addresses: set = dh["addresses"]
-        dh_addresses.remove(address)
-        dh["nthreads"] -= ws.nthreads
-        self.total_nthreads -= ws.nthreads
-        self.total_nthreads_history.append((time(), self.total_nthreads))
-        if not dh_addresses:
-            del self.host_info[host]
+        See also
+        --------
+        remove_worker
+        """
+        out: dict[str, Literal["OK", "already-removed"]] = {
+            self.coerce_address(address): "already-removed" for address in addresses
+        }
+        if self.status == Status.closed:
+            return out
 
-        self.rpc.remove(address)
-        del self.stream_comms[address]
-        del self.aliases[ws.name]
-        self.idle.pop(ws.address, None)
-        self.idle_task_count.discard(ws)
-        self.saturated.discard(ws)
-        del self.workers[address]
-        ws.status = Status.closed
-        self.running.discard(ws)
+        removed: list[WorkerState] = []
+        for address in out:
+            ws = self.workers.get(address)
+            if ws is None:
+                continue
+            logger.info(f"Remove worker {ws} ({stimulus_id=})")
+            self._detach_worker(ws, close=close)
+            removed.append(ws)
 
         recommendations: Recs = {}
+        events = []
+        for ws in removed:
+            address = ws.address
+            if self._speculative:
+                for key, speculative in self._speculative.items():
+                    if speculative is not None and speculative[0] is ws:
+                        self._speculative[key] = None
+            processing_keys = {ts.key for ts in ws.processing}
+            for ts in list(ws.processing):
+                k = ts.key
+                recommendations[k] = "released"
+                if not safe:
+                    ts.suspicious += 1
+                    ts.prefix.suspicious += 1
+                    if ts.suspicious > self.allowed_failures:
+                        del recommendations[k]
+                        e = pickle.dumps(
+                            KilledWorker(
+                                task=k,
+                                last_worker=ws.clean(),
+                                allowed_failures=self.allowed_failures,
+                            ),
+                        )
+                        r = self.transition(
+                            k,
+                            "erred",
+                            exception=e,
+                            cause=k,
+                            stimulus_id=stimulus_id,
+                            worker=address,
+                        )
+                        recommendations.update(r)
+                        logger.error(
+                            "Task %s marked as failed because %d workers died"
+                            " while trying to run it",
+                            ts.key,
+                            ts.suspicious,
+                        )
 
-        processing_keys = {ts.key for ts in ws.processing}
-        for ts in list(ws.processing):
-            k = ts.key
-            recommendations[k] = "released"
-            if not safe:
-                ts.suspicious += 1
-                ts.prefix.suspicious += 1
-                if ts.suspicious > self.allowed_failures:
-                    del recommendations[k]
-                    e = pickle.dumps(
-                        KilledWorker(
-                            task=k,
-                            last_worker=ws.clean(),
-                            allowed_failures=self.allowed_failures,
-                        ),
-                    )
-                    r = self.transition(
-                        k,
-                        "erred",
-                        exception=e,
-                        cause=k,
-                        stimulus_id=stimulus_id,
-                        worker=address,
-                    )
-                    recommendations.update(r)
-                    logger.error(
-                        "Task %s marked as failed because %d workers died"
-                        " while trying to run it",
-                        ts.key,
-                        ts.suspicious,
-                    )
+            recompute_keys = set()
+            lost_keys = set()
 
-        recompute_keys = set()
-        lost_keys = set()
+            for ts in list(ws.has_what):
+                self.remove_replica(ts, ws)
+                if not ts.who_has:
+                    if ts.run_spec:
+                        recompute_keys.add(ts.key)
+                        recommendations[ts.key] = "released"
+                    else:  # pure data
+                        lost_keys.add(ts.key)
+                        recommendations[ts.key] = "forgotten"
 
-        for ts in list(ws.has_what):
-            self.remove_replica(ts, ws)
-            if not ts.who_has:
-                if ts.run_spec:
-                    recompute_keys.add(ts.key)
-                    recommendations[ts.key] = "released"
-                else:  # pure data
-                    lost_keys.add(ts.key)
-                    recommendations[ts.key] = "forgotten"
-
-        if recompute_keys:
-            logger.warning(
-                f"Removing worker {ws.address!r} caused the cluster to lose "
-                "already computed task(s), which will be recomputed elsewhere: "
-                f"{recompute_keys} ({stimulus_id=})"
-            )
-        if lost_keys:
-            logger.error(
-                f"Removing worker {ws.address!r} caused the cluster to lose scattered "
-                f"data, which can't be recovered: {lost_keys} ({stimulus_id=})"
-            )
+            if recompute_keys:
+                logger.warning(
+                    f"Removing worker {ws.address!r} caused the cluster to lose "
+                    "already computed task(s), which will be recomputed elsewhere: "
+                    f"{recompute_keys} ({stimulus_id=})"
+                )
+            if lost_keys:
+                logger.error(
+                    f"Removing worker {ws.address!r} caused the cluster to lose "
+                    f"scattered data, which can't be recovered: {lost_keys} "
+                    f"({stimulus_id=})"
+                )
 
-        event_msg = {
-            "action": "remove-worker",
-            "processing-tasks": processing_keys,
-            "lost-computed-tasks": recompute_keys,
-            "lost-scattered-tasks": lost_keys,
-            "stimulus_id": stimulus_id,
-        }
-        self.log_event(address, event_msg.copy())
-        event_msg["worker"] = address
-        self.log_event("all", event_msg)
+            event_msg = {
+                "action": "remove-worker",
+                "processing-tasks": processing_keys,
+                "lost-computed-tasks": recompute_keys,
+                "lost-scattered-tasks": lost_keys,
+                "stimulus_id": stimulus_id,
+            }
+            self.log_event(address, event_msg.copy())
+            event_msg["worker"] = address
+            events.append(event_msg)
+
+        if not removed:
+            return out
+        for event_msg in events:
+            self.log_event("all", event_msg)
 
         self.transitions(recommendations, stimulus_id=stimulus_id)
 
         awaitables = []
-        for plugin in list(self.plugins.values()):
-            try:
+        for ws in removed:
+            for plugin in list(self.plugins.values()):
                 try:
-                    result = plugin.remove_worker(
-                        scheduler=self, worker=address, stimulus_id=stimulus_id
-                    )
-                except TypeError:
-                    parameters = inspect.signature(plugin.remove_worker).parameters
-                    if "stimulus_id" not in parameters and not any(
-                        p.kind is p.VAR_KEYWORD for p in parameters.values()
-                    ):
-                        # Deprecated (see add_plugin)
-                        result = plugin.remove_worker(scheduler=self, worker=address)  # type: ignore
-                    else:
-                        raise
-                if inspect.isawaitable(result):
-                    awaitables.append(result)
-            except Exception as e:
-                logger.exception(e)
+                    try:
+                        result = plugin.remove_worker(
+                            scheduler=self, worker=ws.address, stimulus_id=stimulus_id
+                        )
+                    except TypeError:
+                        parameters = inspect.signature(
+                            plugin.remove_worker
+                        ).parameters
+                        if "stimulus_id" not in parameters and not any(
+                            p.kind is p.VAR_KEYWORD for p in parameters.values()
+                        ):
+                            # Deprecated (see add_plugin)
+                            result = plugin.remove_worker(  # type: ignore
+                                scheduler=self, worker=ws.address
+                            )
+                        else:
+                            raise
+                    if inspect.isawaitable(result):
+                        awaitables.append(result)
+                except Exception as e:
+                    logger.exception(e)
 
         plugin_msgs = await asyncio.gather(*awaitables, return_exceptions=True)
         plugins_exceptions = [msg for msg in plugin_msgs if isinstance(msg, Exception)]
@@ -5333,35 +5824,70 @@ class Scheduler(SchedulerState, ServerNode):
         if not self.workers:
             logger.info("Lost all workers")
 
-        for w in self.workers:
-            self.bandwidth_workers.pop((address, w), None)
-            self.bandwidth_workers.pop((w, address), None)
-
-        async def remove_worker_from_events() -> None:
-            # If the worker isn't registered anymore after the delay, remove from events
-            if address not in self.workers and address in self.events:
-                del self.events[address]
-
         cleanup_delay = parse_timedelta(
             dask.config.get("distributed.scheduler.events-cleanup-delay")
         )
+        for ws in removed:
+            address = ws.address
+            out[address] = "OK"
+            for w in self.workers:
+                self.bandwidth_workers.pop((address, w), None)
+                self.bandwidth_workers.pop((w, address), None)
 
-        self._ongoing_background_tasks.call_later(
-            cleanup_delay, remove_worker_from_events
-        )
-        logger.debug("Removed worker %s", ws)
-
-        for w in self.workers:
-            self.worker_send(
-                w,
-                {
-                    "op": "remove-worker",
-                    "worker": address,
-                    "stimulus_id": stimulus_id,
-                },
+            self._ongoing_background_tasks.call_later(
+                cleanup_delay, self._remove_worker_from_events, address
             )
+            logger.debug("Removed worker %s", ws)
 
-        return "OK"
+            for w in self.workers:
+                self.worker_send(
+                    w,
+                    {
+                        "op": "remove-worker",
+                        "worker": address,
+                        "stimulus_id": stimulus_id,
+                    },
+                )
+
+        return out
+
+    def _detach_worker(self, ws: WorkerState, close: bool) -> None:
+        """Remove a worker from the scheduler's collections, without touching the
+        tasks it holds or is processing. Part of :meth:`remove_workers`.
+        """
+        address = ws.address
+        if close:
+            with suppress(AttributeError, CommClosedError):
+                self.stream_comms[address].send(
+                    {"op": "close", "reason": "scheduler-remove-worker"}
+                )
+
+        self.remove_resources(address)
+
+        host = get_address_host(address)
+        dh = self.host_info[host]
+        dh_addresses: set = dh["addresses"]
+        dh_addresses.remove(address)
+        dh["nthreads"] -= ws.nthreads
+        self.total_nthreads -= ws.nthreads
+        self.total_nthreads_history.append((time(), self.total_nthreads))
+        if not dh_addresses:
+            del self.host_info[host]
+
+        self.rpc.remove(address)
+        del self.stream_comms[address]
+        del self.aliases[ws.name]
+        self.idle.pop(ws.address, None)
+        self._set_idle_task_count(ws, False)
+        self.saturated.discard(ws)
+        del self.workers[address]
+        ws.status = Status.closed
+        self.running.discard(ws)
+
+    async def _remove_worker_from_events(self, address: str) -> None:
+        # If the worker isn't registered anymore after the delay, remove from events
+        if address not in self.workers and address in self.events:
+            del self.events[address]
 
     def stimulus_cancel(
         self, keys: Collection[Key], client: str, force: bool = False
@@ -5543,6 +6069,113 @@ class Scheduler(SchedulerState, ServerNode):
                 pdb.set_trace()
             raise
 
+    def _check_task(self, ts: TaskState) -> bool:
+        """Validate a single task, reporting a violation as a ``validation``
+        event instead of raising
+
+        Returns True if the task is in a consistent state.
+        """
+        try:
+            ts.validate()
+            func = getattr(self, "validate_" + ts.state.replace("-", "_"), None)
+            if func is not None:
+                func(ts.key)
+        except Exception as e:
+            logger.error("Invalid state for task %s: %r", ts, e)
+            self.log_event(
+                "validation",
+                {
+                    "action": "invalid-task-state",
+                    "key": ts.key,
+                    "state": ts.state,
+                    "error": repr(e),
+                },
+            )
+            return False
+        return True
+
+    def _check_worker(self, ws: WorkerState) -> bool:
+        """Validate a single worker, reporting a violation as a ``validation``
+        event instead of raising
+
+        Returns True if the worker is in a consistent state.
+        """
+        try:
+            validate_worker_state(ws)
+        except Exception as e:
+            logger.error("Invalid state for worker %s: %r", ws, e)
+            self.log_event(
+                "validation",
+                {
+                    "action": "invalid-worker-state",
+                    "worker": ws.address,
+                    "error": repr(e),
+                },
+            )
+            return False
+        return True
+
+    def validate_touched(self) -> int:
+        """Validate the tasks that transitioned since the last call
+
+        Unlike ``distributed.scheduler.validate``, this only costs time
+        proportional to the number of tasks that changed, and violations are
+        reported as ``validation`` events rather than raised. It runs
+        periodically if ``distributed.scheduler.validation-interval`` is set.
+
+        Returns
+        -------
+        The number of tasks found in an inconsistent state
+        """
+        if not self._validation_touched:
+            return 0
+        keys = self._validation_touched
+        self._validation_touched = set()
+
+        violations = 0
+        for key in keys:
+            ts = self.tasks.get(key)
+            if ts is not None and not self._check_task(ts):
+                violations += 1
+        return violations
+
+    async def validate_state_offloaded(self) -> int:
+        """Validate all tasks and workers without blocking the event loop
+
+        A snapshot of the tasks and workers is checked in a dedicated thread, so
+        that the check doesn't hold up the offload thread, e.g. deserializing new
+        graphs. As the event loop keeps mutating the tasks and workers in the
+        meantime, anything that fails there may just be in the middle of a
+        transition, so it is checked again on the event loop before it is
+        reported as a ``validation`` event.
+
+        It runs periodically if ``distributed.scheduler.full-validation-interval``
+        is set, and can be requested over RPC with the ``validate_state_offloaded``
+        handler.
+
+        Returns
+        -------
+        The number of tasks and workers found in an inconsistent state
+        """
+        if self._validation_executor is None:
+            self._validation_executor = ThreadPoolExecutor(
+                1, thread_name_prefix="Dask-Validate"
+            )
+        suspect_tasks, suspect_workers = await run_in_executor_with_context(
+            self._validation_executor,
+            _find_invalid_states,
+            list(self.tasks.values()),
+            list(self.workers.values()),
+        )
+        violations = 0
+        for ts in suspect_tasks:
+            if self.tasks.get(ts.key) is ts and not self._check_task(ts):
+                violations += 1
+        for ws in suspect_workers:
+            if self.workers.get(ws.address) is ws and not self._check_worker(ws):
+                violations += 1
+        return violations
+
     def validate_state(self, allow_overlap: bool = False) -> None:
         validate_state(self.tasks, self.workers, self.clients)
 
@@ -5557,6 +6190,18 @@ class Scheduler(SchedulerState, ServerNode):
             self.running.copy(),
             self.idle_task_count.copy(),
         )
+        assert set(self._idle_task_count_load) == self.idle_task_count
+        for ws, key in self._idle_task_count_load.items():
+            assert self._idle_task_count_by_load[key] is ws
+            assert key == (_idle_task_load(ws), ws.address), (ws, key)
+        assert len(self._idle_task_count_by_load) == len(self.idle_task_count)
+        for key, speculative in self._speculative.items():
+            ts = self.tasks[key]
+            assert ts.state == "processing", ts
+            if speculative is not None:
+                ws = speculative[0]
+                assert ts.processing_on is not ws, (ts, ws)
+                assert self.workers.get(ws.address) is ws, ws
         assert self.running.issuperset(self.saturated), (
             self.running.copy(),
             self.saturated.copy(),
@@ -5787,7 +6432,8 @@ class Scheduler(SchedulerState, ServerNode):
     ) -> None:
         if worker not in self.workers:
             return
-        self.validate_key(key)
+        if self.validate:
+            self.validate_key(key)
 
         r: tuple = self.stimulus_task_finished(
             key=key, worker=worker, stimulus_id=stimulus_id, **msg
@@ -5833,7 +6479,7 @@ class Scheduler(SchedulerState, ServerNode):
             steal.remove_key_from_stealable(ts)
 
         ws = ts.processing_on
-        if ws is None:
+        if ws is None or ws.address != worker:
             logger.debug("Received long-running signal from duplicate task. Ignoring.")
             return
 
@@ -5874,14 +6520,11 @@ class Scheduler(SchedulerState, ServerNode):
         if ws.status == Status.running:
             self.running.add(ws)
             self.check_idle_saturated(ws)
-            self.transitions(
-                self.bulk_schedule_unrunnable_after_adding_worker(ws), stimulus_id
-            )
-            self.stimulus_queue_slots_maybe_opened(stimulus_id=stimulus_id)
+            self._schedule_on_running_worker(ws, stimulus_id)
         else:
             self.running.discard(ws)
             self.idle.pop(ws.address, None)
-            self.idle_task_count.discard(ws)
+            self._set_idle_task_count(ws, False)
             self.saturated.discard(ws)
 
     def handle_request_refresh_who_has(
@@ -5935,9 +6578,35 @@ class Scheduler(SchedulerState, ServerNode):
         finally:
             if worker in self.stream_comms:
                 worker_comm.abort()
-                await self.remove_worker(
-                    worker, stimulus_id=f"handle-worker-cleanup-{time()}"
-                )
+                await self._remove_disconnected_worker(worker)
+
+    async def _remove_disconnected_worker(self, worker: str) -> None:
+        """Remove a worker whose connection dropped, together with all other
+        workers whose connection dropped during the same event loop iteration, e.g.
+        when a pool of spot instances is preempted.
+        """
+        self._disconnected_workers.add(worker)
+        if self._disconnected_workers_removed is not None:
+            # The handler of another worker is going to remove this one too
+            await self._disconnected_workers_removed.wait()
+            return
+
+        removed = self._disconnected_workers_removed = asyncio.Event()
+        try:
+            await asyncio.sleep(0)
+            workers = self._disconnected_workers
+            self._disconnected_workers = set()
+            # Workers that disconnect from now on are removed in the next batch
+            self._disconnected_workers_removed = None
+            stimulus_id = f"handle-worker-cleanup-{time()}"
+            if len(workers) == 1:
+                await self.remove_worker(worker, stimulus_id=stimulus_id)
+            else:
+                await self.remove_workers(workers, stimulus_id=stimulus_id)
+        finally:
+            if self._disconnected_workers_removed is removed:
+                self._disconnected_workers_removed = None
+            removed.set()
 
     def add_plugin(
         self,
@@ -6221,6 +6890,9 @@ class Scheduler(SchedulerState, ServerNode):
                 client=cs.client_key,
                 stimulus_id=stimulus_id,
             )
+        if self.result_cache is not None:
+            # The keys released above were handed over to the cache
+            self.result_cache.clear(stimulus_id=stimulus_id)
 
         self._clear_task_state()
         assert not self.tasks
@@ -6309,12 +6981,7 @@ class Scheduler(SchedulerState, ServerNode):
                 f"Workers {no_nanny_workers} do not use a nanny and will be terminated "
                 "without restarting them"
             )
-            await asyncio.gather(
-                *(
-                    self.remove_worker(address=addr, stimulus_id=stimulus_id)
-                    for addr in no_nanny_workers
-                )
-            )
+            await self.remove_workers(no_nanny_workers, stimulus_id=stimulus_id)
         out: dict[str, Literal["OK", "removed", "timed out"]]
         out = {addr: "removed" for addr in no_nanny_workers}
         deadline = Deadline.after(timeout)
@@ -6365,12 +7032,7 @@ class Scheduler(SchedulerState, ServerNode):
                     f"Workers {list(bad_nannies)} did not shut down within {timeout}s; "
                     "force closing"
                 )
-                await asyncio.gather(
-                    *(
-                        self.remove_worker(addr, stimulus_id=stimulus_id)
-                        for addr in bad_nannies
-                    )
-                )
+                await self.remove_workers(bad_nannies, stimulus_id=stimulus_id)
                 if on_error == "raise":
                     raise TimeoutError(
                         f"{len(bad_nannies)}/{len(nannies)} nanny worker(s) did not "
@@ -7022,6 +7684,14 @@ class Scheduler(SchedulerState, ServerNode):
                     ]
                 )
 
+            chunk_size = parse_bytes(
+                dask.config.get("distributed.scheduler.replicate-chunk-size")
+            )
+            if chunk_size:
+                await self._broadcast_replicas(
+                    tasks, workers, n, branching_factor, chunk_size, stimulus_id
+                )
+
             # Copy not-yet-filled data
             while tasks:
                 gathers = defaultdict(dict)
@@ -7065,6 +7735,69 @@ class Scheduler(SchedulerState, ServerNode):
                 },
             )
 
+    async def _broadcast_replicas(
+        self,
+        tasks: set[TaskState],
+        workers: set[WorkerState],
+        n: int,
+        branching_factor: int,
+        chunk_size: int,
+        stimulus_id: str,
+    ) -> None:
+        """Copy ``tasks`` to ``n`` of ``workers`` by streaming them through trees of
+        workers; see :meth:`Worker.broadcast`.
+
+        Keys held by the same worker that need to be copied to the same workers are
+        broadcast together. Keys that could not be copied are left to the caller.
+        """
+        order = list(workers)
+        random.shuffle(order)
+        broadcasts: defaultdict[tuple[str, tuple[str, ...]], list[Key]] = defaultdict(
+            list
+        )
+        for ts in tasks:
+            assert ts.who_has is not None
+            n_missing = n - len(ts.who_has & workers)
+            if n_missing <= 0:
+                continue
+            targets = [ws.address for ws in order if ws not in ts.who_has]
+            root = min(ts.who_has, key=operator.attrgetter("address"))
+            broadcasts[root.address, tuple(targets[:n_missing])].append(ts.key)
+
+        async def broadcast(root: str, targets: list[str], keys: list[Key]) -> None:
+            try:
+                received = await self.rpc(addr=root).broadcast(
+                    keys=keys,
+                    targets=targets,
+                    branching_factor=branching_factor,
+                    chunk_size=chunk_size,
+                    stimulus_id=stimulus_id,
+                )
+            except OSError as e:
+                logger.warning(
+                    f"Communication with worker {root} failed during "
+                    f"replication: {e.__class__.__name__}: {e}"
+                )
+                return
+            # The workers also report the new replicas through their batched
+            # streams, but the caller expects them to be known as soon as this
+            # returns
+            for address, received_keys in received.items():
+                self.add_keys(
+                    worker=address, keys=received_keys, stimulus_id=stimulus_id
+                )
+            self.log_event(
+                root,
+                {"action": "replicate-broadcast", "keys": keys, "targets": targets},
+            )
+
+        await asyncio.gather(
+            *(
+                broadcast(root, list(targets), keys)
+                for (root, targets), keys in broadcasts.items()
+            )
+        )
+
     @log_errors
     def workers_to_close(
         self,
@@ -8414,7 +9147,7 @@ class Scheduler(SchedulerState, ServerNode):
         now = time()
         stimulus_id = f"check-worker-ttl-{now}"
         assert self.worker_ttl
-        ttl = max(self.worker_ttl, 10 * heartbeat_interval(len(self.workers)))
+        ttl = max(self.worker_ttl, 10 * self._heartbeat_interval())
         to_restart = []
 
         for ws in self.workers.values():
@@ -8433,6 +9166,121 @@ class Scheduler(SchedulerState, ServerNode):
                 stimulus_id=stimulus_id,
             )
 
+    def check_stragglers(self) -> None:
+        """Start duplicates of straggling tasks on idle workers
+
+        A task is a straggler when it has been executing for longer than
+        ``distributed.scheduler.speculative-execution.multiplier`` times the mean
+        execution time of its prefix. The multiplier can be overridden per task
+        with the ``speculative`` annotation; a falsy value disables it.
+
+        The original attempt keeps running. Whichever of the two finishes first
+        provides the result, and the other one is cancelled on its worker. A task
+        is duplicated at most once while it is processing.
+
+        See also
+        --------
+        Scheduler._accept_speculative
+        """
+        if not self.idle:
+            return
+        now = time()
+        stragglers = []
+        for ws in self.running:
+            for ts, duration in ws.executing.items():
+                if (
+                    ts.processing_on is not ws
+                    or ts.actor
+                    or ts.key in self._speculative
+                ):
+                    continue
+                multiplier = self.speculation_multiplier
+                if ts.annotations:
+                    multiplier = ts.annotations.get("speculative", multiplier)
+                tp = ts.prefix
+                if not multiplier or not tp.compute_count:
+                    continue
+                average = tp.all_durations["compute"] / tp.compute_count
+                if duration + now - ws.last_seen > multiplier * average:
+                    stragglers.append((ts, ws, duration))
+        if not stragglers:
+            return
+
+        stimulus_id = f"speculative-execution-{now}"
+        steal = self.extensions.get("stealing")
+        busy = {sp[0] for sp in self._speculative.values() if sp is not None}
+        worker_msgs: Msgs = {}
+        for ts, victim, duration in stragglers:
+            if steal and ts in steal.in_flight:
+                continue
+            valid = self.valid_workers(ts)
+            thief = next(
+                (
+                    ws
+                    for ws in self.idle.values()
+                    if ws is not victim
+                    and ws not in busy
+                    and (valid is None or ws in valid)
+                ),
+                None,
+            )
+            if thief is None:
+                continue
+            logger.info(
+                "Task %s has been running on %s for %.1fs; starting a duplicate on %s",
+                ts.key,
+                victim.address,
+                duration,
+                thief.address,
+            )
+            self.log_event(
+                "speculative-execution",
+                {
+                    "key": ts.key,
+                    "from": victim.address,
+                    "to": thief.address,
+                    "duration": duration,
+                    "stimulus_id": stimulus_id,
+                },
+            )
+            # Don't let work stealing move the original attempt onto the duplicate
+            if steal:
+                steal.remove_key_from_stealable(ts)
+            # The duplicate gets its own run_id, so that the scheduler can tell the
+            # two attempts apart when they report back
+            run_id = ts.run_id
+            msg = self._task_to_msg(ts)
+            ts.run_id = run_id
+            self._speculative[ts.key] = (thief, msg["run_id"])
+            busy.add(thief)
+            worker_msgs[thief.address] = [msg]
+        self.send_all({}, worker_msgs)
+
+    def _accept_speculative(self, ts: TaskState, stimulus_id: str) -> Msgs:
+        """The duplicate of ``ts`` started by :meth:`check_stragglers` finished before
+        the original attempt. Move the task to the worker of the duplicate and cancel
+        the original attempt.
+
+        Returns
+        -------
+        Messages to workers
+        """
+        speculative = self._speculative.pop(ts.key)
+        assert speculative is not None
+        ws, run_id = speculative
+        worker_msgs: Msgs = {}
+        original = self._exit_processing_common(ts)
+        if original is not None:
+            worker_msgs[original.address] = [
+                {"op": "free-keys", "keys": [ts.key], "stimulus_id": stimulus_id}
+            ]
+        ws.add_to_processing(ts)
+        ts.processing_on = ws
+        ts.run_id = run_id
+        self.acquire_resources(ts, ws)
+        self.check_idle_saturated(ws)
+        return worker_msgs
+
     def check_idle(self) -> float | None:
         if self.status in (Status.closing, Status.closed):
             return None  # pragma: nocover
@@ -8649,6 +9497,41 @@ def _task_to_report_msg(ts: TaskState) -> dict[str, Any] | None:
         return None
 
 
+#: Messages whose only per-key payload is a ``keys`` list, which can be merged
+#: together when they are sent back-to-back to the same recipient
+_COALESCIBLE_OPS = frozenset({"free-keys", "cancelled-keys"})
+
+
+def _coalesce_msgs(msgs: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Merge runs of consecutive ``free-keys`` or ``cancelled-keys`` messages with the
+    same stimulus_id into a single message.
+
+    Only adjacent messages are merged, so that the relative order of all other
+    messages (e.g. a ``compute-task`` followed by a ``free-keys`` for the same key) is
+    preserved. The input messages are not modified, as the same message object may
+    have been addressed to multiple recipients.
+    """
+    out: list[dict[str, Any]] = []
+    prev: dict[str, Any] | None = None
+    copied = False
+    for msg in msgs:
+        op = msg["op"]
+        if (
+            prev is not None
+            and op == prev["op"]
+            and msg.get("stimulus_id") == prev.get("stimulus_id")
+        ):
+            if not copied:
+                prev = out[-1] = {**prev, "keys": list(prev["keys"])}
+                copied = True
+            prev["keys"].extend(msg["keys"])
+        else:
+            prev = msg if op in _COALESCIBLE_OPS else None
+            copied = False
+            out.append(msg)
+    return out
+
+
 def _task_to_client_msgs(ts: TaskState) -> Msgs:
     if ts.who_wants:
         report_msg = _task_to_report_msg(ts)
@@ -8856,6 +9739,32 @@ def validate_state(
             )
 
 
+def _find_invalid_states(
+    tasks: list[TaskState], workers: list[WorkerState]
+) -> tuple[list[TaskState], list[WorkerState]]:
+    """Return the tasks and workers that fail validation
+
+    This is meant to run outside of the event loop, so any error, including
+    collections changing size mid-iteration, only makes a candidate for
+    re-validation.
+    """
+    bad_tasks = []
+    for ts in tasks:
+        try:
+            validate_task_state(ts)
+        except Exception:
+            bad_tasks.append(ts)
+
+    bad_workers = []
+    for ws in workers:
+        try:
+            validate_worker_state(ws)
+        except Exception:
+            bad_workers.append(ws)
+
+    return bad_tasks, bad_workers
+
+
 def heartbeat_interval(n: int) -> float:
     """Interval in seconds that we desire heartbeats based on number of workers"""
     if n <= 10:
@@ -8877,12 +9786,39 @@ def _task_slots_available(ws: WorkerState, saturation_factor: float) -> int:
     )
 
 
+def _idle_task_load(ws: WorkerState) -> float:
+    """Sort key of an idle worker in ``SchedulerState._idle_task_count_by_load``"""
+    return len(ws.processing) / ws.nthreads if ws.nthreads else math.inf
+
+
 def _worker_full(ws: WorkerState, saturation_factor: float) -> bool:
     if math.isinf(saturation_factor):
         return False
     return _task_slots_available(ws, saturation_factor) <= 0
 
 
+def _reduction_targets(ts: TaskState, max_depth: int = 5) -> set[TaskState]:
+    """The closest downstream tasks of ``ts`` that combine it with other tasks
+
+    Linear chains of tasks with a single dependency, e.g. the output of
+    ``map_partitions``, are followed for up to ``max_depth`` levels. Two root tasks
+    with common reduction targets are best computed on the same worker.
+    """
+    targets: set[TaskState] = set()
+    frontier = ts.dependents
+    for _ in range(max_depth):
+        chained: set[TaskState] = set()
+        for dts in frontier:
+            if len(dts.dependencies) > 1:
+                targets.add(dts)
+            else:
+                chained.update(dts.dependents)
+        if not chained:
+            break
+        frontier = chained
+    return targets
+
+
 class KilledWorker(Exception):
     def __init__(self, task: Key, last_worker: WorkerState, allowed_failures: int):
         super().__init__(task, last_worker, allowed_failures)
@@ -8981,6 +9917,61 @@ class CollectTaskMetaDataPlugin(SchedulerPlugin):
                 self.keys.discard(key)
 
 
+def _prepare_graph(
+    graph_header: dict,
+    graph_frames: list[bytes],
+    global_annotations: dict[str, Any],
+    internal_priority: dict[Key, int] | None,
+) -> tuple[
+    dict[Key, T_runspec],
+    dict[Key, set[Key]],
+    dict[str, dict[Key, Any]],
+    dict[Key, int],
+    dict[str, float],
+]:
+    """Deserialize, materialize and order a graph submitted by a client
+
+    This does not access the scheduler state and is meant to run in the offload
+    thread. Alongside the materialized graph it returns the wall time spent in
+    each phase.
+    """
+    durations = {}
+    start = time()
+    try:
+        graph = deserialize(graph_header, graph_frames).data
+        del graph_header, graph_frames
+    except Exception as e:
+        msg = """\
+            Error during deserialization of the task graph. This frequently
+            occurs if the Scheduler and Client have different environments.
+            For more information, see
+            https://docs.dask.org/en/stable/deployment-considerations.html#consistent-software-environments
+        """
+        raise RuntimeError(textwrap.dedent(msg)) from e
+    stop = time()
+    durations["deserialize"] = stop - start
+
+    start = stop
+    dsk, dependencies, annotations_by_type = _materialize_graph(
+        graph=graph, global_annotations=global_annotations
+    )
+    del graph
+    stop = time()
+    durations["materialize"] = stop - start
+
+    if not internal_priority:
+        start = stop
+        # Removing all non-local keys before calling order()
+        dsk_keys = set(dsk)  # intersection() of sets is much faster than dict_keys
+        stripped_deps = {
+            k: v.intersection(dsk_keys) for k, v in dependencies.items() if k in dsk_keys
+        }
+        internal_priority = dask.order.order(dsk=dsk, dependencies=stripped_deps)
+        durations["order"] = time() - start
+
+    return dsk, dependencies, annotations_by_type, internal_priority, durations
+
+
 def _materialize_graph(
     graph: HighLevelGraph, global_annotations: dict[str, Any]
 ) -> tuple[dict[Key, T_runspec], dict[Key, set[Key]], dict[str, dict[Key, Any]]]:
@@ -4,7 +4,6 @@ import asyncio
 import logging
 from collections import defaultdict, deque
 from collections.abc import Container
-from functools import partial
 from math import log2
 from time import time
 from typing import TYPE_CHECKING, Any, ClassVar, TypedDict, cast
@@ -539,7 +538,7 @@ def _get_thief(
             potential_thieves = valid_thieves
         elif not ts.loose_restrictions:
             return None
-    return min(potential_thieves, key=partial(scheduler.worker_objective, ts))
+    return min(potential_thieves, key=scheduler.worker_objective_for(ts))
 
 
 fast_tasks = {
@@ -299,3 +299,44 @@ async def test_clear(c, s, a, b):
 
     while s.tasks:
         await asyncio.sleep(0.3)
+
+
+@gen_cluster(client=True)
+async def test_as_completed_many_futures(c, s, a, b):
+    gathers = 0
+    _gather = c._gather
+
+    async def counting_gather(*args, **kwargs):
+        nonlocal gathers
+        gathers += 1
+        return await _gather(*args, **kwargs)
+
+    c._gather = counting_gather
+    before = len(asyncio.all_tasks())
+    futures = c.map(inc, range(1000))
+    ac = as_completed(futures, with_results=True)
+    await asyncio.sleep(0.01)
+    # No coroutine per future
+    assert len(asyncio.all_tasks()) < before + 10
+
+    results = [result async for _, result in ac]
+    assert sorted(results) == list(range(1, 1001))
+    # Results of futures that complete together are gathered together
+    assert gathers < len(futures)
+
+
+@gen_cluster(client=True)
+async def test_wait_many_futures(c, s, a, b):
+    futures = c.map(slowinc, range(1000), delay=0.001)
+    before = len(asyncio.all_tasks())
+    task = asyncio.create_task(wait(futures))
+    await asyncio.sleep(0.01)
+    assert len(asyncio.all_tasks()) < before + 10
+    done, not_done = await task
+    assert done == set(futures)
+    assert not not_done
+
+    x = c.submit(slowinc, 1, delay=0.2)
+    done, not_done = await wait([x, x], return_when="FIRST_COMPLETED")
+    assert done == {x}
+    assert not not_done
@@ -804,14 +804,15 @@ async def test_cancelled_task_error_rejected(c, s, a, b):
         expect=[
             (f3.key, "ready", "executing", "executing", {}),
             (f3.key, "executing", "error", "error", {}),
+            # f2 and f3 are released by the same free-keys message
             (
                 f3.key,
                 "error",
                 "released",
                 "released",
-                {f3.key: "forgotten"},
+                {f2.key: "released", f3.key: "forgotten"},
             ),
-            (f3.key, "released", "forgotten", "forgotten", {}),
+            (f3.key, "released", "forgotten", "forgotten", {f2.key: "forgotten"}),
         ],
     )
 
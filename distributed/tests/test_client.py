@@ -19,6 +19,7 @@ import sys
 import threading
 import traceback
 import types
+import uuid
 import weakref
 import zipfile
 from collections import deque, namedtuple
@@ -254,6 +255,129 @@ async def test_map_batch_size(c, s, a, b):
     assert result == list(range(100, 120, 2))
 
 
+@gen_cluster(client=True)
+async def test_submit_batch(c, s, a, b):
+    update_graph = s.stream_handlers["update-graph"]
+    calls = []
+
+    async def count_update_graph(*args, **kwargs):
+        calls.append(kwargs["keys"])
+        return await update_graph(*args, **kwargs)
+
+    s.stream_handlers["update-graph"] = count_update_graph
+
+    with c.submit_batch():
+        xs = [c.submit(inc, i, pure=False) for i in range(100)]
+        y = c.submit(sum, xs, key="y")
+        zs = c.map(inc, range(10), workers=[a.address], priority=10)
+        assert not calls
+        await asyncio.sleep(0.05)
+        assert not calls
+        assert not s.tasks
+
+    assert await y == sum(range(1, 101))
+    assert await c.gather(zs) == list(range(1, 11))
+    assert len(calls) == 1
+    assert len(calls[0]) == 111
+    # Annotations of each call are preserved
+    assert all(z.key in a.data for z in zs)
+    assert s.tasks[zs[0].key].priority[0] == -10
+    assert s.tasks[xs[0].key].priority[0] == 0
+    # Impure keys are unique and cheap to generate
+    assert len({x.key for x in xs}) == 100
+    assert xs[1].key.startswith("inc-")
+
+
+@gen_cluster(client=True)
+async def test_submit_batch_fifo_timeout(c, s, a, b):
+    """Consecutive submissions with the same fifo_timeout are sent together"""
+    update_graph = s.stream_handlers["update-graph"]
+    calls = []
+
+    async def record_update_graph(*args, **kwargs):
+        calls.append((len(kwargs["keys"]), kwargs["fifo_timeout"]))
+        return await update_graph(*args, **kwargs)
+
+    s.stream_handlers["update-graph"] = record_update_graph
+
+    with c.submit_batch():
+        futures = [
+            c.submit(inc, 1, fifo_timeout="1s"),
+            c.submit(inc, 2, fifo_timeout="1000ms"),
+            c.submit(inc, 3, fifo_timeout=0),
+            c.submit(inc, 4, fifo_timeout="1s"),
+        ]
+    assert await c.gather(futures) == [2, 3, 4, 5]
+    assert calls == [(2, "1s"), (1, 0), (1, "1s")]
+
+
+@gen_cluster(client=True)
+async def test_submit_batch_concurrent_tasks(c, s, a, b):
+    """Only the asyncio task that opened the block batches its submissions"""
+    ev = asyncio.Event()
+
+    async def batched():
+        with c.submit_batch():
+            x = c.submit(inc, 1, key="x")
+            await ev.wait()
+        return x
+
+    async def not_batched():
+        y = c.submit(inc, 2, key="y")
+        await async_poll_for(lambda: "y" in s.tasks, timeout=5)
+        assert "x" not in s.tasks
+        ev.set()
+        return y
+
+    x, y = await asyncio.gather(batched(), not_batched())
+    assert await c.gather([x, y]) == [2, 3]
+
+
+@gen_cluster(client=True)
+async def test_submit_batch_other_graphs(c, s, a, b):
+    """Graphs other than submit and map are not batched, and are sent after the
+    batched graphs they may depend on"""
+    with c.submit_batch():
+        x = c.submit(inc, 1, key="x")
+        y = c.get({"y": (inc, 10)}, "y", sync=False)
+        await async_poll_for(lambda: "x" in s.tasks, timeout=5)
+        z = c.compute(delayed(inc)(x))
+        w = c.submit(inc, 3, key="w")
+    assert await c.gather([x, y, z, w]) == [2, 11, 3, 4]
+    assert all(s.tasks[k.key].priority for k in (x, w))
+
+
+def test_submit_batch_wait_in_block(c):
+    with c.submit_batch():
+        x = c.submit(inc, 1)
+        assert x.result() == 2
+        y = c.submit(inc, x)
+        assert c.get({"z": (inc, 10)}, "z") == 11
+        z = c.submit(inc, y)
+        assert c.gather(z) == 4
+
+
+def test_submit_impure_key_outside_batch(c):
+    x = c.submit(inc, 1, pure=False)
+    assert uuid.UUID(x.key[len("inc-") :])
+
+
+@gen_cluster(client=True)
+async def test_submit_batch_release_in_block(c, s, a, b):
+    with c.submit_batch():
+        x = c.submit(inc, 1, key="x")
+        y = c.submit(inc, 2, key="y")
+        del x
+    assert await y == 3
+    assert "x" not in s.tasks
+
+    with c.submit_batch():
+        x = c.submit(inc, 1, key="x")
+        del x
+    await asyncio.sleep(0.05)
+    assert "x" not in s.tasks
+
+
 @gen_cluster(client=True)
 async def test_custom_key_with_batches(c, s, a, b):
     """Test of <https://github.com/dask/distributed/issues/4588>"""
@@ -655,6 +779,132 @@ async def test_gather_skip(c, s, a):
     assert not sched.getvalue()
 
 
+@gen_cluster(client=True)
+async def test_gather_iter(c, s, a, b):
+    first = c.submit(inc, 100)
+    await first
+    ev = Event()
+    futures = c.map(lambda x, ev: ev.wait() and x, range(20), ev=ev)
+    results = []
+    async for future, result in c.gather_iter(
+        [first, futures], max_in_flight_bytes=100
+    ):
+        if future is first:
+            # Results are yielded as soon as they are available
+            assert not results
+            await ev.set()
+        results.append((future, result))
+
+    assert results[0] == (first, 101)
+    assert sorted(r for _, r in results[1:]) == list(range(20))
+    assert {f for f, _ in results} == {first, *futures}
+
+
+@gen_cluster(client=True)
+async def test_gather_iter_errors(c, s, a, b):
+    x = c.submit(div, 1, 0)
+    y = c.submit(inc, 1)
+    with pytest.raises(ZeroDivisionError):
+        async for _ in c.gather_iter([x, y]):
+            pass
+
+    results = [r async for _, r in c.gather_iter([x, y], errors="skip")]
+    assert results == [2]
+
+
+def test_gather_iter_sync(c):
+    futures = c.map(inc, range(10))
+    sink = {}
+    results = list(c.gather_iter(futures, sink=sink))
+    assert sorted(f.key for f, _ in results) == sorted(f.key for f in futures)
+    assert {r for _, r in results} == {None}
+    assert sink == {f.key: i + 1 for i, f in enumerate(futures)}
+
+
+@gen_cluster(client=True, nthreads=[("", 1)] * 3)
+async def test_scatter_iter(c, s, *workers):
+    def gen():
+        for i in range(20):
+            yield i
+
+    futures = await c.scatter_iter(gen(), chunk_size=10)
+    assert [f.key for f in futures] == [f.key for f in await c.scatter(list(range(20)))]
+    assert await c.gather(futures) == list(range(20))
+    assert all(f.type == int for f in futures)
+    # Chunks of data are spread across the workers
+    assert all(w.data for w in workers)
+
+    d = await c.scatter_iter({"x": 1, "y": [2]}, hash=False)
+    assert await c.gather(d) == {"x": 1, "y": [2]}
+
+    futures = await c.scatter_iter([1, 1, "foo"], hash=False)
+    assert len({f.key for f in futures}) == 3
+    assert await c.gather(futures) == [1, 1, "foo"]
+
+
+@gen_cluster(client=True, nthreads=[("", 1)] * 4)
+async def test_scatter_iter_broadcast(c, s, *workers):
+    received = []
+
+    def counting(update_data):
+        def counting_update_data(**kwargs):
+            received.append(kwargs["data"])
+            return update_data(**kwargs)
+
+        return counting_update_data
+
+    for w in workers:
+        w.handlers["update_data"] = counting(w.handlers["update_data"])
+
+    futures = await c.scatter_iter(
+        (b"0" * 1000 for _ in range(10)), hash=False, chunk_size=1000, broadcast=True
+    )
+    assert len(futures) == 10
+    assert all(len(s.tasks[f.key].who_has) == 4 for f in futures)
+    # The client sent one copy of every chunk; the workers relayed the others
+    assert len(received) == 10
+
+    futures = await c.scatter_iter(range(10), broadcast=2)
+    assert all(len(s.tasks[f.key].who_has) == 2 for f in futures)
+
+
+@gen_cluster(client=True)
+async def test_scatter_iter_chunk_size(c, s, a, b):
+    with pytest.raises(ValueError, match="chunk_size must be positive"):
+        await c.scatter_iter(range(10), chunk_size=0)
+
+    # Chunks larger than max_in_flight_bytes are still sent, one at a time
+    futures = await c.scatter_iter(
+        (b"0" * 1000 for _ in range(4)),
+        hash=False,
+        chunk_size=1000,
+        max_in_flight_bytes=10,
+    )
+    assert await c.gather(futures) == [b"0" * 1000] * 4
+
+
+@gen_cluster(client=True, nthreads=[("", 1)] * 3)
+async def test_scatter_iter_not_direct(c, s, *workers):
+    futures = await c.scatter_iter(
+        (b"0" * 1000 for _ in range(10)),
+        hash=False,
+        chunk_size=1000,
+        max_in_flight_bytes=2000,
+        direct=False,
+        broadcast=2,
+    )
+    assert await c.gather(futures) == [b"0" * 1000] * 10
+    assert all(len(s.tasks[f.key].who_has) == 2 for f in futures)
+    # Every chunk went through the scheduler
+    scatters = [msg for _, msg in s.get_events(c.id) if msg["action"] == "scatter"]
+    assert sum(msg["count"] for msg in scatters) == 10
+
+
+def test_scatter_iter_sync(c):
+    futures = c.scatter_iter(iter(range(10)), chunk_size=1)
+    assert c.gather(futures) == list(range(10))
+
+
 @gen_cluster(client=True)
 async def test_limit_concurrent_gathering(c, s, a, b):
     futures = c.map(inc, range(100))
@@ -830,6 +1080,50 @@ async def test_garbage_collection_with_scatter(c, s, a, b):
         await asyncio.sleep(0.1)
 
 
+@gen_cluster(client=True)
+async def test_garbage_collection_batched(c, s, a, b):
+    client_releases_keys = s.stream_handlers["client-releases-keys"]
+    calls = []
+
+    def count_client_releases_keys(*args, **kwargs):
+        calls.append(kwargs["keys"])
+        return client_releases_keys(*args, **kwargs)
+
+    s.stream_handlers["client-releases-keys"] = count_client_releases_keys
+
+    futures = c.map(inc, range(100))
+    await wait(futures)
+    keys = {f.key for f in futures}
+    del futures
+
+    while s.tasks:
+        await asyncio.sleep(0.01)
+    assert len(calls) == 1
+    assert set(calls[0]) == keys
+    assert not c.refcount
+    assert not c.futures
+
+
+@gen_cluster(client=True)
+async def test_garbage_collection_batched_ordering(c, s, a, b):
+    """Keys released before a submission are released before it reaches the
+    scheduler, and keys released after it are released after it"""
+    x = c.submit(inc, 1, key="x")
+    z = c.submit(inc, 2, key="z")
+    await wait([x, z])
+
+    del z
+    y = c.submit(inc, x, key="y")
+    del x
+    assert await y == 3
+
+    while "z" in s.tasks or s.tasks["x"].who_wants:
+        await asyncio.sleep(0.01)
+    del y
+    while s.tasks:
+        await asyncio.sleep(0.01)
+
+
 @gen_cluster(client=True)
 async def test_recompute_released_key(c, s, a, b):
     x = c.submit(inc, 100)
@@ -3202,6 +3496,85 @@ async def test_replicate_tree_branching(c, s, *workers):
     assert max_count > 1
 
 
+@gen_cluster(
+    client=True,
+    nthreads=[("127.0.0.1", 1)] * 7,
+    config={**NO_AMM, "distributed.scheduler.replicate-chunk-size": "1 kiB"},
+)
+async def test_replicate_broadcast(c, s, *workers):
+    futures = await c.scatter(
+        [b"0" * 10_000, b"1" * 10, list(range(1000))], workers=[workers[0].address]
+    )
+    y = await c.scatter(2, workers=[workers[1].address])
+    await c.replicate(futures + [y], n=6)
+
+    for f in futures + [y]:
+        assert len(s.tasks[f.key].who_has) == 6
+    for w in workers:
+        for f in futures + [y]:
+            if f.key in w.data:
+                assert w.data[f.key] == await f
+    actions = [msg["action"] for events in s.get_events().values() for _, msg in events]
+    # The keys were streamed through a tree of workers, without copying them
+    # level by level
+    assert actions.count("replicate-broadcast") == 2
+    assert "replicate-add" not in actions
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[("127.0.0.1", 1)] * 4,
+    config={**NO_AMM, "distributed.scheduler.replicate-chunk-size": "1 kiB"},
+)
+async def test_replicate_broadcast_relay_fails(c, s, *workers):
+    """Workers that could not be reached through the broadcast tree receive the
+    keys later, from the scheduler"""
+    [x] = await c.scatter([b"0" * 10_000], workers=[workers[0].address])
+
+    async def broken_relay(comm, **kwargs):
+        comm.abort()
+        return Status.dont_reply
+
+    for w in workers[1:3]:
+        w.handlers["broadcast_relay"] = broken_relay
+
+    await c.replicate([x])
+    assert len(s.tasks[x.key].who_has) == 4
+    assert all(w.data[x.key] == b"0" * 10_000 for w in workers)
+    s.validate_state()
+
+
+@pytest.mark.parametrize("chunk_size", ["64 kiB", 0])
+@pytest.mark.parametrize("nworkers", [2, 8])
+def test_replicate_chunk_size(nworkers, chunk_size):
+    """Data is streamed through a tree of workers only if
+    ``replicate-chunk-size`` is set; either way every worker ends up with a copy"""
+
+    @gen_cluster(
+        client=True,
+        nthreads=[("127.0.0.1", 1)] * nworkers,
+        config={**NO_AMM, "distributed.scheduler.replicate-chunk-size": chunk_size},
+    )
+    async def test(c, s, *workers):
+        data = b"0" * 2**20
+        [x] = await c.scatter([data], workers=[workers[0].address])
+        await c.replicate([x])
+        assert len(s.tasks[x.key].who_has) == nworkers
+        assert all(w.data[x.key] == data for w in workers)
+
+        actions = [
+            msg["action"] for events in s.get_events().values() for _, msg in events
+        ]
+        if chunk_size:
+            assert actions.count("replicate-broadcast") == 1
+            assert "replicate-add" not in actions
+        else:
+            assert "replicate-broadcast" not in actions
+            assert "replicate-add" in actions
+
+    test()
+
+
 @gen_cluster(
     client=True,
     nthreads=[("127.0.0.1", 1)] * 10,
@@ -323,6 +323,7 @@ def test_schema_is_complete():
 
     skip = {
         "distributed.scheduler.default-task-durations",
+        "distributed.scheduler.fair-share.weights",
         "distributed.scheduler.dashboard.bokeh-application",
         "distributed.nanny.environ",
         "distributed.nanny.pre-spawn-environ",
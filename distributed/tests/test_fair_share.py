@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import dask
+
+from distributed import Client
+from distributed.utils import thread_state
+from distributed.utils_test import gen_cluster, inc, slowinc
+
+CONFIG = {"distributed.scheduler.fair-share.enabled": True}
+
+
+@gen_cluster(client=True, nthreads=[("", 1)], config=CONFIG)
+async def test_fair_share_small_graph_overtakes_large_one(c, s, a):
+    fair_share = s.extensions["fair_share"]
+    assert s.fair_share is fair_share
+
+    big = c.map(slowinc, range(50), delay=0.02, key=[f"big-{i}" for i in range(50)])
+    while a.state.executed_count < 5:
+        await asyncio.sleep(0.01)
+
+    async with Client(s.address, asynchronous=True) as c2:
+        small = c2.map(inc, range(3), key=[f"small-{i}" for i in range(3)])
+        await c2.gather(small)
+        # Without fair share, the small graph would run after the whole big one
+        assert sum(f.done() for f in big) < 25
+
+        await c.gather(big)
+        info = await c.scheduler.fair_share_info()
+        assert info[c.id]["tasks"] == 50
+        assert info[c2.id]["tasks"] == 3
+        assert info[c.id]["share"] + info[c2.id]["share"] == pytest.approx(1)
+        assert info[c.id]["share"] > info[c2.id]["share"]
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[],
+    config={
+        **CONFIG,
+        "distributed.scheduler.fair-share.weights": {"interactive": 4},
+    },
+)
+async def test_fair_share_weights(c, s):
+    with dask.annotate(tenant="batch"):
+        x = c.map(inc, range(8), key=[f"x-{i}" for i in range(8)])
+    with dask.annotate(tenant="interactive"):
+        y = c.map(inc, range(8), key=[f"y-{i}" for i in range(8)])
+    while len(s.tasks) < 16:
+        await asyncio.sleep(0.01)
+
+    assert s.fair_share.tenants["x-0"] == "batch"
+    assert s.fair_share.tenants["y-0"] == "interactive"
+    x_tags = sorted(s.tasks[f"x-{i}"].priority[1] for i in range(8))
+    y_tags = sorted(s.tasks[f"y-{i}"].priority[1] for i in range(8))
+    assert x_tags == [1.0 + i for i in range(8)]
+    assert y_tags == [0.25 * (i + 1) for i in range(8)]
+
+    await c.scheduler.fair_share_set_weight(tenant="batch", weight=2)
+    with dask.annotate(tenant="batch"):
+        z = c.submit(inc, 1, key="z", fifo_timeout=0)
+    while "z" not in s.tasks:
+        await asyncio.sleep(0.01)
+    assert s.tasks["z"].priority[1] == 8.5
+    del x, y, z
+
+
+@gen_cluster(client=True, nthreads=[], config=CONFIG)
+async def test_fair_share_mixed_submit_compute(c, s):
+    """Every kind of submission is tagged in the same virtual time, and the graph
+    generation keeps advancing"""
+    x = c.submit(inc, 1, key="x", fifo_timeout=0)
+    while "x" not in s.tasks:
+        await asyncio.sleep(0.01)
+    y = c.compute(
+        dask.delayed(inc)(dask.delayed(inc)(1, dask_key_name="y0"), dask_key_name="y1"),
+        fifo_timeout=0,
+    )
+    while "y1" not in s.tasks:
+        await asyncio.sleep(0.01)
+    # Submitted from within a task that has since been released
+    thread_state.key = "released-parent"
+    try:
+        z = c.submit(inc, 2, key="z", fifo_timeout=0)
+    finally:
+        del thread_state.key
+    while "z" not in s.tasks:
+        await asyncio.sleep(0.01)
+
+    assert s.generation == 2
+    priorities = {k: s.tasks[k].priority for k in ["x", "y0", "y1", "z"]}
+    assert [p[1] for p in priorities.values()] == [1.0, 2.0, 3.0, 4.0]
+    assert sorted(priorities, key=priorities.get) == ["x", "y0", "y1", "z"]
+    del x, y, z
+
+
+@gen_cluster(client=True)
+async def test_fair_share_disabled(c, s, a, b):
+    assert s.fair_share is None
+    x = c.submit(inc, 1, key="x")
+    await x
+    assert not s.extensions["fair_share"].tenants
+    assert await c.scheduler.fair_share_info() == {}
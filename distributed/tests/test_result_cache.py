@@ -0,0 +1,105 @@
+from __future__ import annotations
+
+from distributed import Nanny
+from distributed.utils_test import async_poll_for, gen_cluster, inc
+
+CONFIG = {"distributed.scheduler.result-cache-size": "10 kiB"}
+
+
+def make_bytes(n: int) -> bytes:
+    return b"0" * n
+
+
+@gen_cluster(client=True, config=CONFIG)
+async def test_result_cache_reuse(c, s, a, b):
+    cache = s.extensions["result_cache"]
+    assert s.result_cache is cache
+
+    x = c.submit(inc, 1, key="x")
+    assert await x == 2
+    assert cache.misses == 1
+    del x
+    await async_poll_for(lambda: "x" in cache.keys, timeout=5)
+    assert s.tasks["x"].state == "memory"
+    assert s.tasks["x"].who_wants == {cache.client}
+
+    x = c.submit(inc, 1, key="x")
+    assert await x == 2
+    assert cache.hits == 1
+    assert "x" not in cache.keys
+    assert [t.finish for t in s.story("x")].count("processing") == 1
+
+    info = await c.scheduler.result_cache_info()
+    assert info["hits"] == 1
+    assert info["misses"] == 1
+
+
+@gen_cluster(client=True, config=CONFIG)
+async def test_result_cache_evicts_least_recently_released(c, s, a, b):
+    cache = s.extensions["result_cache"]
+    for key in ("x", "y", "z"):
+        fut = c.submit(make_bytes, 4000, key=key)
+        await fut
+        del fut
+        await async_poll_for(lambda: key in cache.keys, timeout=5)
+
+    assert list(cache.keys) == ["y", "z"]
+    assert cache.evictions == 1
+    assert cache.nbytes == sum(cache.keys.values()) <= cache.limit
+    await async_poll_for(lambda: "x" not in s.tasks, timeout=5)
+
+    # Results larger than the whole cache are not retained
+    big = c.submit(make_bytes, 20_000, key="big")
+    await big
+    del big
+    await async_poll_for(lambda: "big" not in s.tasks, timeout=5)
+    assert list(cache.keys) == ["y", "z"]
+
+    await c.scheduler.result_cache_clear()
+    assert not cache.keys
+    assert not cache.nbytes
+    await async_poll_for(lambda: not s.tasks, timeout=5)
+
+
+@gen_cluster(client=True, nthreads=[("", 1)], config=CONFIG)
+async def test_result_cache_lost_result_is_not_recomputed(c, s, a):
+    cache = s.extensions["result_cache"]
+    x = c.submit(inc, 1, key="x")
+    await x
+    del x
+    await async_poll_for(lambda: "x" in cache.keys, timeout=5)
+
+    await s.remove_worker(a.address, stimulus_id="test")
+    assert not cache.keys
+    assert not cache.nbytes
+    assert "x" not in s.tasks
+
+
+@gen_cluster(client=True)
+async def test_result_cache_disabled(c, s, a, b):
+    assert s.result_cache is None
+    assert "result-cache" not in s.clients
+    x = c.submit(inc, 1, key="x")
+    await x
+    del x
+    await async_poll_for(lambda: "x" not in s.tasks, timeout=5)
+
+
+@gen_cluster(client=True, Worker=Nanny, config=CONFIG)
+async def test_result_cache_restart(c, s, a, b):
+    cache = s.extensions["result_cache"]
+    x = c.submit(inc, 1, key="x")
+    await x
+    del x
+    await async_poll_for(lambda: "x" in cache.keys, timeout=5)
+    y = c.submit(inc, 2, key="y")
+    await y
+
+    await c.restart()
+    assert not s.tasks
+    assert not cache.keys
+    assert not cache.nbytes
+    assert not cache.client.wants_what
+
+    x = c.submit(inc, 1, key="x")
+    assert await x == 2
@@ -10,6 +10,7 @@ import pickle
 import random
 import re
 import sys
+import threading
 from collections.abc import Collection
 from itertools import product
 from textwrap import dedent
@@ -47,8 +48,15 @@ from distributed.metrics import time
 from distributed.protocol import serialize
 from distributed.protocol.pickle import dumps, loads
 from distributed.protocol.serialize import ToPickle
-from distributed.scheduler import KilledWorker, MemoryState, Scheduler, WorkerState
-from distributed.utils import TimeoutError, wait_for
+from distributed.scheduler import (
+    HEARTBEAT_MAX_SLOWDOWN,
+    KilledWorker,
+    MemoryState,
+    Scheduler,
+    WorkerState,
+    heartbeat_interval,
+)
+from distributed.utils import TimeoutError, offload, wait_for
 from distributed.utils_test import (
     NO_AMM,
     BlockedGatherDep,
@@ -149,6 +157,71 @@ async def test_decide_worker_with_many_independent_leaves(c, s, a, b):
     assert nhits > 80
 
 
+@gen_cluster(client=True, nthreads=[("", 1)] * 4)
+async def test_worker_objective_for_wide_fan_in(c, s, *workers):
+    """The indexed objective used by decide_worker must rank candidates exactly
+    like worker_objective"""
+    rng = random.Random(42)
+    xs = []
+    for i in range(40):
+        holders = rng.sample(workers, rng.randint(1, 3))
+        futs = await c.scatter(
+            {f"x-{i}": b"x" * rng.randint(1, 100_000)},
+            workers=[w.address for w in holders],
+            broadcast=True,
+        )
+        xs.append(futs[f"x-{i}"])
+
+    y = c.submit(lambda *args: None, *xs, key="y")
+    await wait(y)
+    ts = s.tasks["y"]
+    assert len(ts.dependencies) == 40
+    objective = s.worker_objective_for(ts)
+    for ws in s.workers.values():
+        assert objective(ws) == s.worker_objective(ts, ws)
+    assert min(s.workers.values(), key=objective) is min(
+        s.workers.values(), key=lambda ws: s.worker_objective(ts, ws)
+    )
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)] * 2,
+    worker_kwargs={"memory_limit": "1 GiB"},
+)
+async def test_worker_objective_memory_target(c, s, a, b):
+    """Workers which would be pushed past their target memory by the predicted
+    output of a task are only picked as a last resort"""
+    x = c.submit(lambda: b"0" * 20_000_000, key="big-0", workers=[a.address])
+    await x
+    ts = s.tasks["big-0"]
+    assert ts.prefix.nbytes_average == ts.nbytes >= 20_000_000
+
+    wsa = s.workers[a.address]
+    wsb = s.workers[b.address]
+    # b is busier, but a is close to its target memory
+    wsb._occupancy_cache = 10.0
+    wsa.metrics["memory"] = int(0.59 * 2**30)
+    wsa._memory_unmanaged_old = wsa.metrics["memory"] - wsa.nbytes
+    assert s.worker_objective(ts, wsa)[0] is True
+    assert s.worker_objective(ts, wsb)[0] is False
+    objective = s.worker_objective_for(ts)
+    assert objective(wsa) == s.worker_objective(ts, wsa)
+    assert min([wsa, wsb], key=objective) is wsb
+
+    # The threshold matches the worker's optimistic memory
+    for ws in (wsa, wsb):
+        headroom = int(s.MEMORY_TARGET * ws.memory_limit) - ws.memory.optimistic
+        comm_bytes = headroom - ts.prefix.nbytes_average
+        assert not s._exceeds_memory_target(ts, ws, comm_bytes)
+        assert s._exceeds_memory_target(ts, ws, comm_bytes + 1)
+
+    s.MEMORY_TARGET = False
+    assert s.worker_objective(ts, wsa)[0] is False
+    assert min([wsa, wsb], key=objective) is wsa
+    wsb._occupancy_cache = None
+
+
 @gen_cluster(client=True, nthreads=[("127.0.0.1", 1)] * 3)
 async def test_decide_worker_with_restrictions(client, s, a, b, c):
     x = client.submit(inc, 1, workers=[a.address, b.address])
@@ -426,6 +499,110 @@ async def test_graph_execution_width(c, s, *workers):
     assert all(0 < count <= 2 for count in res.values())
 
 
+def _load(i):
+    return b"0" * 100_000
+
+
+def _combine(*args):
+    return sum(x if isinstance(x, int) else len(x) for x in args)
+
+
+def _tree_reduction(n):
+    parts = [delayed(_load)(i, dask_key_name=("load", i)) for i in range(n)]
+    while len(parts) > 1:
+        parts = [delayed(_combine)(*parts[i : i + 2]) for i in range(0, len(parts), 2)]
+    return parts[0]
+
+
+@gen_cluster(
+    nthreads=[("", 2)] * 2,
+    client=True,
+    config={
+        "distributed.scheduler.worker-saturation": 1.0,
+        "distributed.scheduler.work-stealing": False,
+        "distributed.scheduler.co-assign-siblings": True,
+    },
+)
+async def test_co_assign_siblings(c, s, a, b):
+    """Queued root tasks that feed the same reduction are sent to the same worker"""
+    assigned = {}
+
+    class RecordWorker(SchedulerPlugin):
+        def transition(self, key, start, finish, *args, **kwargs):
+            if finish == "processing" and key[0] == "load":
+                assigned[key[1]] = s.tasks[key].processing_on.address
+
+    s.add_plugin(RecordWorker())
+    assert await c.compute(_tree_reduction(64)) == 64 * 100_000
+    assert len(assigned) == 64
+    assert set(assigned.values()) == {a.address, b.address}
+    # A pair can still be split when a downstream task fills up the worker of the
+    # first sibling before the second one leaves the queue. Without co-assignment,
+    # about half of the pairs are split.
+    together = sum(assigned[i] == assigned[i + 1] for i in range(0, 64, 2))
+    assert together >= 28, together
+
+
+@pytest.mark.slow
+@gen_cluster(
+    nthreads=[("", 2)] * 2,
+    client=True,
+    config={
+        "distributed.scheduler.worker-saturation": 1.0,
+        "distributed.scheduler.work-stealing": False,
+    },
+)
+async def test_co_assign_siblings_transfers(c, s, a, b):
+    """Benchmark the bytes transferred by a tree reduction of queued root tasks, with
+    and without co-assignment of the siblings that feed the same reduction"""
+
+    async def reduction_transfers(co_assign):
+        s.CO_ASSIGN_SIBLINGS = co_assign
+        for w in (a, b):
+            w.transfer_incoming_log.clear()
+        assert await c.compute(_tree_reduction(64)) == 64 * 100_000
+        return sum(log["total"] for w in (a, b) for log in w.transfer_incoming_log)
+
+    before = await reduction_transfers(False)
+    after = await reduction_transfers(True)
+    assert after < before / 2, (before, after)
+
+
+@gen_cluster(
+    nthreads=[("", 2), ("", 1), ("", 4)],
+    client=True,
+    config={"distributed.scheduler.worker-saturation": 1.0},
+)
+async def test_idle_task_count_index(c, s, *workers):
+    """Queued root tasks are sent to the least busy worker, which is looked up from
+    an index that is kept up to date as tasks start and finish"""
+    assert s.decide_worker_rootish_queuing_enabled() in s.idle_task_count
+    ev = Event()
+    futs = c.map(lambda i, ev: ev.wait(), range(20), ev=ev)
+    await async_poll_for(lambda: len(s.queued) == 13, timeout=5)
+    s.validate_state()
+    assert not s.idle_task_count
+    assert s.decide_worker_rootish_queuing_enabled() is None
+    assert [len(s.workers[w.address].processing) for w in workers] == [2, 1, 4]
+
+    await ev.set()
+    await c.gather(futs)
+    s.validate_state()
+    assert len(s.idle_task_count) == 3
+
+
+@gen_cluster(nthreads=[("", 1), ("", 1)])
+async def test_idle_task_count_index_no_threads(s, a, b):
+    """A worker without threads is ranked last in the index of idle workers"""
+    ws = s.workers[b.address]
+    ws.nthreads = 0
+    s.total_nthreads -= 1
+    s._set_idle_task_count(ws, True)
+    assert s._idle_task_count_load[ws] == (math.inf, b.address)
+    s.validate_state()
+    assert s.decide_worker_rootish_queuing_enabled() is s.workers[a.address]
+
+
 @gen_cluster(client=True, nthreads=[("", 1)])
 async def test_forget_tasks_while_processing(c, s, a, b):
     events = [Event() for _ in range(10)]
@@ -437,6 +614,69 @@ async def test_forget_tasks_while_processing(c, s, a, b):
     assert not s.tasks
 
 
+@gen_cluster(client=True, nthreads=[("", 1)])
+async def test_empty_dependencies_are_not_allocated(c, s, a):
+    """Root tasks and graph outputs share a single placeholder for their empty
+    dependencies/dependents, which is replaced on first insertion and restored when
+    the last related task is forgotten.
+    """
+    x = c.submit(inc, 1, key="x")
+    y = c.submit(inc, x, key="y")
+    await y
+    tx, ty = s.tasks["x"], s.tasks["y"]
+    assert not tx.dependencies
+    assert tx.dependencies is ty.dependents
+    assert tx.dependents == {ty}
+    assert ty.dependencies == {tx}
+
+    del y
+    while "y" in s.tasks:
+        await asyncio.sleep(0.01)
+    assert not tx.dependents
+    assert tx.dependents is tx.dependencies
+    s.validate_state()
+
+
+@gen_cluster(client=True, nthreads=[("", 1)])
+async def test_release_many_keys_sends_single_free_keys(c, s, a):
+    futures = c.map(inc, range(20))
+    await wait(futures)
+
+    sent = []
+    bcomm = s.stream_comms[a.address]
+    orig_send = bcomm.send
+
+    def send(*msgs):
+        sent.extend(msgs)
+        orig_send(*msgs)
+
+    bcomm.send = send
+    s.client_releases_keys(keys=[f.key for f in futures], client=c.id)
+    free_keys_msgs = [msg for msg in sent if msg["op"] == "free-keys"]
+    assert len(free_keys_msgs) == 1
+    assert sorted(free_keys_msgs[0]["keys"]) == sorted(f.key for f in futures)
+
+    while a.state.tasks:
+        await asyncio.sleep(0.01)
+
+
+def test_coalesce_msgs():
+    from distributed.scheduler import _coalesce_msgs
+
+    fk1 = {"op": "free-keys", "keys": ["x"], "stimulus_id": "s1"}
+    fk2 = {"op": "free-keys", "keys": ["y"], "stimulus_id": "s1"}
+    fk3 = {"op": "free-keys", "keys": ["z"], "stimulus_id": "s2"}
+    ct = {"op": "compute-task", "key": "x"}
+    assert _coalesce_msgs([fk1, fk2, ct, fk1, fk3]) == [
+        {"op": "free-keys", "keys": ["x", "y"], "stimulus_id": "s1"},
+        ct,
+        fk1,
+        fk3,
+    ]
+    # Inputs are not mutated
+    assert fk1 == {"op": "free-keys", "keys": ["x"], "stimulus_id": "s1"}
+
+
 @pytest.mark.slow
 @gen_cluster(client=True, nthreads=[("", 1)], Worker=Nanny)
 async def test_restart_while_processing(c, s, a, b):
@@ -500,6 +740,28 @@ async def test_queued_release_multiple_workers(c, s, *workers):
         await c2.gather(second_batch)
 
 
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)],
+    config={"distributed.scheduler.worker-saturation": 1.0},
+)
+async def test_queued_bulk_release_to_new_worker(c, s, a):
+    """When many slots open at once, the queued tasks with the highest priority are
+    all assigned in a single pass"""
+    ev = Event()
+    futs = c.map(lambda i, ev: ev.wait(), range(20), ev=ev)
+    await async_poll_for(lambda: len(s.queued) == 19, timeout=5)
+    expect = [ts.key for ts in s.queued.peekn(4)]
+
+    async with Worker(s.address, nthreads=4) as b:
+        await async_poll_for(lambda: len(s.queued) == 15, timeout=5)
+        ws = s.workers[b.address]
+        assert {ts.key for ts in ws.processing} == set(expect)
+        assert s.digests_total["queued-slots-opened-duration"] > 0
+        await ev.set()
+        await c.gather(futs)
+
+
 @gen_cluster(
     client=True,
     nthreads=[("", 2)] * 2,
@@ -1084,6 +1346,235 @@ async def test_ready_remove_worker(c, s, a, b, worker_saturation):
     await ev.set()
 
 
+@gen_cluster(client=True, nthreads=[("", 1)] * 4)
+async def test_remove_workers(c, s, a, b, *survivors):
+    removed = []
+
+    class Plugin(SchedulerPlugin):
+        def remove_worker(self, scheduler, worker, *, stimulus_id, **kwargs):
+            removed.append((worker, stimulus_id))
+
+    s.add_plugin(Plugin())
+    ev = Event()
+    x = await c.scatter(1, workers=[a.address])
+    futs = c.map(lambda i, ev: ev.wait(), range(8), ev=ev)
+    await async_poll_for(lambda: len(a.state.executing) == 1, timeout=5)
+
+    transitions = []
+    orig_transitions = s.transitions
+
+    def record_transitions(recommendations, stimulus_id):
+        transitions.append(dict(recommendations))
+        return orig_transitions(recommendations, stimulus_id)
+
+    s.transitions = record_transitions
+    # Results are keyed by the coerced addresses
+    out = await s.remove_workers(
+        [a.address, b.address.removeprefix("tcp://"), "tcp://127.0.0.1:1"],
+        stimulus_id="test",
+    )
+    assert out == {
+        a.address: "OK",
+        b.address: "OK",
+        "tcp://127.0.0.1:1": "already-removed",
+    }
+    assert removed == [(a.address, "test"), (b.address, "test")]
+    assert len(transitions) == 1
+    assert x.key not in s.tasks
+    assert {w.address for w in s.workers.values()} == {
+        w.address for w in survivors
+    }
+    for fut in futs:
+        ts = s.tasks[fut.key]
+        assert ts.processing_on is None or ts.processing_on.address in s.workers
+    assert [msg["worker"] for _, msg in s.get_events("all")[-2:]] == [
+        a.address,
+        b.address,
+    ]
+    await ev.set()
+    await c.gather(futs)
+
+
+@gen_cluster(nthreads=[("", 1)] * 3)
+async def test_disconnected_workers_removed_together(s, a, b, c):
+    calls = []
+    orig_remove_workers = s.remove_workers
+
+    async def remove_workers(addresses, **kwargs):
+        calls.append(set(addresses))
+        return await orig_remove_workers(addresses, **kwargs)
+
+    s.remove_workers = remove_workers
+    await asyncio.gather(
+        s._remove_disconnected_worker(a.address),
+        s._remove_disconnected_worker(b.address),
+    )
+    assert calls == [{a.address, b.address}]
+    assert set(s.workers) == {c.address}
+
+
+@gen_cluster(nthreads=[("", 1)] * 3)
+async def test_disconnected_workers_handlers_wait_for_removal(s, a, b, c):
+    """The handlers of all the workers removed together return only once the
+    workers have been removed"""
+    ev = asyncio.Event()
+    orig_remove_workers = s.remove_workers
+
+    async def remove_workers(addresses, **kwargs):
+        if len(addresses) > 1:
+            await ev.wait()
+        return await orig_remove_workers(addresses, **kwargs)
+
+    s.remove_workers = remove_workers
+    tasks = [
+        asyncio.create_task(s._remove_disconnected_worker(a.address)),
+        asyncio.create_task(s._remove_disconnected_worker(b.address)),
+    ]
+    await asyncio.sleep(0.05)
+    assert not any(task.done() for task in tasks)
+    # A worker that disconnects in the meantime is removed on its own
+    await s._remove_disconnected_worker(c.address)
+    assert set(s.workers) == {a.address, b.address}
+    assert not any(task.done() for task in tasks)
+
+    ev.set()
+    await asyncio.gather(*tasks)
+    assert not s.workers
+    assert not s._disconnected_workers
+    assert s._disconnected_workers_removed is None
+
+
+def _straggle_once(x, ev):
+    if not ev.is_set():
+        ev.set()
+        sleep(2)
+    return x + 1
+
+
+def _straggle_then_fail(x, ev):
+    if not ev.is_set():
+        ev.set()
+        sleep(2)
+        return x + 1
+    raise ValueError("duplicate failed")
+
+
+@pytest.mark.parametrize("annotate", [False, True])
+def test_speculative_execution(annotate):
+    """The duplicate of a straggler finishes first; the original is cancelled"""
+    config = {"distributed.scheduler.speculative-execution.interval": "50ms"}
+    if not annotate:
+        config["distributed.scheduler.speculative-execution.multiplier"] = 3
+
+    @gen_cluster(client=True, nthreads=[("", 1)] * 2, config=config)
+    async def test(c, s, a, b):
+        await c.gather(c.map(inc, range(10), key=[f"job-{i}" for i in range(10)]))
+        assert s.task_prefixes["job"].compute_count == 10
+
+        ev = Event()
+        with dask.annotate(speculative=3 if annotate else None):
+            x = c.submit(_straggle_once, 1, ev, key="job-10")
+        assert await x == 2
+        (event,) = [msg for _, msg in s.get_events("speculative-execution")]
+        assert event["key"] == "job-10"
+        assert event["from"] != event["to"]
+        assert s.tasks["job-10"].worker_restrictions is None
+        assert s.tasks["job-10"].who_has == {s.workers[event["to"]]}
+        assert not s._speculative
+        (original,) = [w for w in (a, b) if w.address == event["from"]]
+        await async_poll_for(lambda: "job-10" not in original.state.tasks, timeout=5)
+        assert s.tasks["job-10"].who_has == {s.workers[event["to"]]}
+
+    test()
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)] * 3,
+    config={
+        "distributed.scheduler.speculative-execution.interval": "50ms",
+        "distributed.scheduler.speculative-execution.multiplier": 3,
+    },
+)
+async def test_speculative_execution_original_wins(c, s, a, b, w):
+    """A task that is slow everywhere is duplicated once; the original attempt
+    finishes first and the duplicate is cancelled"""
+    await c.gather(c.map(inc, range(10), key=[f"job-{i}" for i in range(10)]))
+    x = c.submit(slowinc, 1, delay=2, key="job-10")
+    await async_poll_for(lambda: s._speculative, timeout=5)
+    ((dup_ws, _),) = s._speculative.values()
+    original_ws = s.tasks["job-10"].processing_on
+    assert dup_ws is not original_ws
+    (dup,) = [w for w in (a, b, w) if w.address == dup_ws.address]
+    await async_poll_for(lambda: "job-10" in dup.state.tasks, timeout=5)
+
+    assert await x == 2
+    (event,) = [msg for _, msg in s.get_events("speculative-execution")]
+    assert event["key"] == "job-10"
+    assert event["from"] == original_ws.address
+    assert s.tasks["job-10"].who_has == {original_ws}
+    assert not s._speculative
+    await async_poll_for(lambda: "job-10" not in dup.state.tasks, timeout=5)
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)] * 2,
+    config={
+        "distributed.scheduler.speculative-execution.interval": "50ms",
+        "distributed.scheduler.speculative-execution.multiplier": 3,
+    },
+)
+async def test_speculative_execution_duplicate_fails(c, s, a, b):
+    """A failing duplicate doesn't fail the task while the original is running"""
+    await c.gather(c.map(inc, range(10), key=[f"job-{i}" for i in range(10)]))
+    ev = Event()
+    x = c.submit(_straggle_then_fail, 1, ev, key="job-10")
+    assert await x == 2
+    (event,) = [msg for _, msg in s.get_events("speculative-execution")]
+    assert s.tasks["job-10"].who_has == {s.workers[event["from"]]}
+    assert not s._speculative
+
+
+@gen_cluster(client=True, nthreads=[("", 1)] * 2)
+async def test_speculative_execution_disabled(c, s, a, b):
+    await c.gather(c.map(inc, range(10), key=[f"job-{i}" for i in range(10)]))
+    x = c.submit(slowinc, 1, delay=1, key="job-10")
+    assert await x == 2
+    assert not s.get_events("speculative-execution")
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[],
+    config={"distributed.scheduler.worker-registration-window": "1h"},
+)
+async def test_worker_registration_window(c, s):
+    """Workers joining within the window are scheduled on together once it closes.
+    The window is long enough to never close on its own during the test, so that
+    it can be closed by hand once both workers have joined.
+    """
+    batches = []
+    orig_bulk_schedule = s.bulk_schedule_unrunnable_after_adding_workers
+
+    def bulk_schedule(workers):
+        batches.append({ws.address for ws in workers})
+        return orig_bulk_schedule(workers)
+
+    s.bulk_schedule_unrunnable_after_adding_workers = bulk_schedule
+    futs = c.map(inc, range(20))
+    await async_poll_for(lambda: len(s.tasks) == 20, timeout=5)
+
+    async with Worker(s.address, nthreads=1) as a, Worker(s.address, nthreads=1) as b:
+        await async_poll_for(lambda: len(s._workers_to_schedule) == 2, timeout=5)
+        assert not batches
+        assert not s.workers[a.address].processing
+        await s._schedule_after_adding_workers()
+        assert not s._workers_to_schedule
+        assert await c.gather(futs) == list(range(1, 21))
+        assert batches == [{a.address, b.address}]
+
+
 @pytest.mark.slow
 @gen_cluster(client=True, Worker=Nanny, timeout=60)
 async def test_restart(c, s, a, b):
@@ -1443,6 +1934,60 @@ async def test_update_graph_culls(s, a, b):
     assert "z" not in s.tasks
 
 
+@gen_cluster(client=True, nthreads=[("", 1)])
+async def test_update_graph_phase_durations(c, s, a):
+    phases = ("deserialize", "materialize", "order", "taskstates")
+    x = delayed(inc)(1)
+    y = delayed(inc)(x)
+    await c.compute(y)
+    for phase in phases:
+        assert s.digests_total[f"update-graph-{phase}-duration"] > 0
+    assert s.digests_total["update-graph-duration"] >= sum(
+        s.digests_total[f"update-graph-{phase}-duration"] for phase in phases
+    )
+
+
+@gen_cluster(client=True, nthreads=[("", 1)])
+async def test_handler_durations(c, s, a):
+    class Plugin(SchedulerPlugin):
+        def transition(self, *args, **kwargs):
+            pass
+
+    s.add_plugin(Plugin(), name="myplugin")
+    await c.submit(inc, 1, key="x")
+    assert s.digests_total["stream-handler", "task-finished", "seconds"] > 0
+    assert s.digests_total["transition", "processing", "memory", "seconds"] > 0
+    assert s.digests_total["plugin", "myplugin", "transition", "seconds"] > 0
+    assert s.digests_total["plugin", "myplugin", "update_graph", "seconds"] > 0
+    # Only the scheduler measures its stream handlers
+    assert not any(
+        isinstance(k, tuple) and k[0] == "stream-handler" for k in a.digests_total
+    )
+
+
+_unpickling_threads = []
+
+
+def _record_unpickling_thread():
+    _unpickling_threads.append(threading.current_thread())
+    return RecordUnpicklingThread()
+
+
+class RecordUnpicklingThread:
+    def __reduce__(self):
+        return _record_unpickling_thread, ()
+
+
+@gen_cluster(client=True, nthreads=[])
+async def test_update_graph_deserializes_off_event_loop(c, s):
+    _unpickling_threads.clear()
+    x = c.submit(lambda _: None, RecordUnpicklingThread(), key="x")
+    await async_poll_for(lambda: "x" in s.tasks, timeout=5)
+    assert _unpickling_threads
+    assert threading.current_thread() not in _unpickling_threads
+    del x
+
+
 @gen_test()
 async def test_io_loop(loop):
     with pytest.warns(
@@ -1471,6 +2016,149 @@ async def test_story(c, s, a, b):
     assert s.story(x.key) == s.story(s.tasks[x.key])
 
 
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)],
+    config={"distributed.scheduler.transition-log-sampling": 0.0},
+)
+async def test_story_sampling(c, s, a):
+    await c.submit(inc, 1, key="x")
+    assert not s.transition_log
+    assert not s.story("x")
+
+    s.start_recording_transitions(keys=["y"], prefixes=["z"])
+    await c.gather(
+        [
+            c.submit(inc, 2, key="y"),
+            c.submit(inc, 3, key="z-1"),
+            c.submit(inc, 4, key="w"),
+        ]
+    )
+    assert {t.key for t in s.transition_log} == {"y", "z-1"}
+    assert [t.finish for t in s.story("y")] == ["waiting", "processing", "memory"]
+
+    s.stop_recording_transitions(keys=["y"], prefixes=["z"])
+    s.transition_log.clear()
+    await c.submit(inc, 5, key="z-2")
+    assert not s.transition_log
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)],
+    config={"distributed.scheduler.transition-log-sampling": 0.5},
+)
+async def test_story_sampling_by_key(c, s, a):
+    """Tasks are sampled by key, so that the story of a sampled task is complete"""
+    futs = c.map(inc, range(100))
+    await c.gather(futs)
+    sampled = {t.key for t in s.transition_log}
+    assert 0 < len(sampled) < 100
+    for key in sampled:
+        assert [t.finish for t in s.story(key)][-1] == "memory"
+        assert s.story(key)[0].finish == "waiting"
+
+
+@gen_cluster()
+async def test_heartbeat_interval_adapts_to_load(s, a, b):
+    s._tick_interval_observed = s._tick_interval
+    assert s._heartbeat_interval() == heartbeat_interval(2)
+    s._tick_interval_observed = s._tick_interval * 3
+    assert s._heartbeat_interval() == pytest.approx(heartbeat_interval(2) * 3)
+    s._tick_interval_observed = s._tick_interval * 1000
+    assert s._heartbeat_interval() == pytest.approx(
+        heartbeat_interval(2) * HEARTBEAT_MAX_SLOWDOWN
+    )
+    await a.heartbeat()
+    assert (
+        a.periodic_callbacks["heartbeat"].callback_time
+        >= heartbeat_interval(2) * 1000
+    )
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)],
+    config={"distributed.scheduler.validation-interval": "1h"},
+)
+async def test_validate_touched(c, s, a):
+    x = c.submit(inc, 1, key="x")
+    y = c.submit(inc, x, key="y")
+    await y
+    assert {"x", "y"} <= s._validation_touched
+    assert s.validate_touched() == 0
+    assert not s._validation_touched
+    assert s.validate_touched() == 0
+
+    # Corrupt a task without transitioning it
+    z = c.submit(inc, 10, key="z")
+    await z
+    assert s._validation_touched == {"z"}
+    s.validate_touched()
+    s.tasks["y"].waiting_on = {s.tasks["z"]}
+    assert s.validate_touched() == 0
+
+    s._validation_touched.add("y")
+    assert s.validate_touched() == 1
+    assert await s.validate_state_offloaded() == 1
+    events = [msg for _, msg in s.get_events("validation")]
+    assert len(events) == 2
+    assert events[0]["action"] == "invalid-task-state"
+    assert events[0]["key"] == "y"
+
+    s.tasks["y"].waiting_on = None
+    assert await s.validate_state_offloaded() == 0
+
+
+@gen_cluster(
+    client=True,
+    nthreads=[("", 1)],
+    config={"distributed.scheduler.full-validation-interval": "10ms"},
+)
+async def test_validate_state_offloaded_periodic(c, s, a):
+    assert "validate-offloaded" in s.periodic_callbacks
+    x = c.submit(inc, 1, key="x")
+    y = c.submit(inc, 2, key="y")
+    await wait([x, y])
+    assert await s.rpc(s.address).validate_state_offloaded() == 0
+
+    # Corrupt a task without transitioning it
+    s.tasks["x"].waiting_on = {s.tasks["y"]}
+    await async_poll_for(lambda: s.get_events("validation"), timeout=5)
+    _, msg = s.get_events("validation")[0]
+    assert msg["action"] == "invalid-task-state"
+    assert msg["key"] == "x"
+    assert await s.rpc(s.address).validate_state_offloaded() == 1
+    s.tasks["x"].waiting_on = None
+
+
+@gen_cluster(client=True, nthreads=[("", 1)])
+async def test_validate_state_offloaded_own_thread(c, s, a):
+    """The full validation doesn't wait for, nor hold up, the offload thread"""
+    await c.submit(inc, 1, key="x")
+    ev = threading.Event()
+    blocked = asyncio.create_task(offload(ev.wait, 30))
+    await asyncio.sleep(0.1)
+    try:
+        assert await wait_for(s.validate_state_offloaded(), timeout=5) == 0
+    finally:
+        ev.set()
+        await blocked
+
+
+@gen_cluster()
+async def test_validate_state_offloaded_disabled(s, a, b):
+    assert "validate-offloaded" not in s.periodic_callbacks
+
+
+@gen_cluster(client=True)
+async def test_validate_touched_disabled(c, s, a, b):
+    await c.submit(inc, 1)
+    assert s._validation_touched is None
+    assert "validate-touched" not in s.periodic_callbacks
+    assert s.validate_touched() == 0
+
+
 @pytest.mark.parametrize("direct", [False, True])
 @gen_cluster(client=True, nthreads=[])
 async def test_scatter_no_workers(c, s, direct):
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import random
+from collections import defaultdict
 from unittest import mock
 
 import pytest
@@ -15,8 +16,10 @@ from distributed.core import ConnectionPool, Status
 from distributed.utils_comm import (
     WrappedKey,
     gather_from_workers,
+    gather_from_workers_iter,
     pack_data,
     retry,
+    scatter_to_workers_iter,
     subs_multiple,
     unpack_remotedata,
 )
@@ -128,6 +131,152 @@ async def test_gather_from_workers_busy(c, s):
         assert out1 == out2 == ({"x": 1}, [], [], [])
 
 
+@gen_cluster(client=True)
+async def test_gather_from_workers_iter(c, s, a, b, monkeypatch):
+    import distributed.worker
+
+    get_data_from_worker = distributed.worker.get_data_from_worker
+    in_flight = []
+    max_in_flight = 0
+
+    async def counting_get_data_from_worker(rpc, keys, worker, **kwargs):
+        nonlocal max_in_flight
+        in_flight.append(worker)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.01)
+        try:
+            return await get_data_from_worker(rpc, keys, worker, **kwargs)
+        finally:
+            in_flight.remove(worker)
+
+    monkeypatch.setattr(
+        distributed.worker, "get_data_from_worker", counting_get_data_from_worker
+    )
+    xs = await c.scatter(
+        {f"x{i}": b"0" * 1000 for i in range(20)}, workers=[a.address]
+    )
+    y = await c.scatter({"y": 1}, workers=[b.address])
+    who_has = {f"x{i}": [a.address] for i in range(20)}
+    who_has["y"] = [b.address]
+    who_has["z"] = []
+    nbytes = {f"x{i}": 1000 for i in range(20)}
+
+    data = {}
+    missing = []
+    rpc = await ConnectionPool()
+    async for d, missing_keys, failed_keys, missing_workers in (
+        gather_from_workers_iter(
+            who_has,
+            nbytes,
+            rpc,
+            max_in_flight_bytes=4000,
+            max_requests_per_worker=2,
+        )
+    ):
+        # Batches are at most max_in_flight_bytes / 4
+        assert len(d) <= 1
+        assert not failed_keys
+        assert not missing_workers
+        missing += missing_keys
+        data.update(d)
+    await rpc.close()
+
+    assert missing == ["z"]
+    assert data == {**{f"x{i}": b"0" * 1000 for i in range(20)}, "y": 1}
+    # Two requests to a, one to b
+    assert max_in_flight == 3
+    del xs, y
+
+
+@gen_cluster(client=True)
+async def test_gather_from_workers_iter_replicas(c, s, a, b, monkeypatch):
+    """Each batch is only requested from the worker it was planned for; the other
+    holders are asked for the keys that worker failed to provide"""
+    import distributed.worker
+
+    get_data_from_worker = distributed.worker.get_data_from_worker
+    in_flight = defaultdict(int)
+    max_in_flight = defaultdict(int)
+
+    async def counting_get_data_from_worker(rpc, keys, worker, **kwargs):
+        in_flight[worker] += 1
+        max_in_flight[worker] = max(max_in_flight[worker], in_flight[worker])
+        await asyncio.sleep(0.01)
+        try:
+            return await get_data_from_worker(rpc, keys, worker, **kwargs)
+        finally:
+            in_flight[worker] -= 1
+
+    monkeypatch.setattr(
+        distributed.worker, "get_data_from_worker", counting_get_data_from_worker
+    )
+    xs = await c.scatter({f"x{i}": b"0" * 1000 for i in range(20)}, broadcast=True)
+    who_has = {k: [a.address, b.address] for k in xs}
+    nbytes = {f"x{i}": 1000 for i in range(20)}
+
+    data = {}
+    rpc = await ConnectionPool()
+    async for d, missing_keys, failed_keys, _ in gather_from_workers_iter(
+        who_has, nbytes, rpc, max_in_flight_bytes=4000, max_requests_per_worker=1
+    ):
+        assert not missing_keys
+        assert not failed_keys
+        data.update(d)
+    assert data == {f"x{i}": b"0" * 1000 for i in range(20)}
+    assert max_in_flight == {a.address: 1, b.address: 1}
+
+    # a doesn't actually hold y
+    y = await c.scatter({"y": 1}, workers=[b.address])
+    batches = gather_from_workers_iter(
+        {"y": [a.address, b.address]}, {"y": 1}, rpc, max_in_flight_bytes=4000
+    )
+    assert [batch async for batch in batches] == [({"y": 1}, [], [], [])]
+    await rpc.close()
+    del xs, y
+
+
+@gen_cluster()
+async def test_scatter_to_workers_iter(s, a, b):
+    in_flight = []
+    max_in_flight = 0
+    update_data = a.handlers["update_data"]
+
+    async def slow_update_data(**kwargs):
+        nonlocal max_in_flight
+        in_flight.append(None)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        await asyncio.sleep(0.2)
+        in_flight.pop()
+        return update_data(**kwargs)
+
+    a.handlers["update_data"] = slow_update_data
+    pulled = 0
+
+    async def chunks():
+        nonlocal pulled
+        for i in range(0, 20, 2):
+            pulled += 1
+            yield {f"x{i}": i, f"x{i + 1}": i + 1}
+
+    who_has = {}
+    rpc = await ConnectionPool()
+    async for chunk_who_has, nbytes in scatter_to_workers_iter(
+        [a.address, b.address], chunks(), rpc, max_requests_per_worker=2
+    ):
+        assert nbytes.keys() == chunk_who_has.keys()
+        # Chunks are only pulled once they can be sent
+        assert pulled - len(who_has) // 2 <= 4
+        who_has.update(chunk_who_has)
+    await rpc.close()
+
+    assert who_has.keys() == {f"x{i}" for i in range(20)}
+    assert a.data.keys() | b.data.keys() == who_has.keys()
+    assert all(who_has[k] == [a.address] for k in a.data)
+    # The slow worker received fewer chunks
+    assert max_in_flight == 2
+    assert len(a.data) < len(b.data)
+
+
 @pytest.mark.parametrize("when", ["pickle", "unpickle"])
 @gen_cluster(client=True)
 async def test_gather_from_workers_serialization_error(c, s, a, b, when):
@@ -999,6 +999,37 @@ async def test_heartbeats(c, s, a, b):
     assert a.periodic_callbacks["heartbeat"].callback_time < 1000
 
 
+@gen_cluster(client=True, nthreads=[("", 1)])
+async def test_heartbeat_metrics_delta(c, s, a):
+    calls = []
+    handler = s.handlers["heartbeat_worker"]
+
+    def record_heartbeat(**kwargs):
+        calls.append(kwargs)
+        return handler(**kwargs)
+
+    s.handlers["heartbeat_worker"] = record_heartbeat
+    a.periodic_callbacks["heartbeat"].stop()
+    a._acked_heartbeat_metrics = None
+
+    await a.heartbeat()
+    await a.heartbeat()
+    (full, delta) = calls
+    assert not full["metrics_delta"]
+    assert delta["metrics_delta"]
+    assert "managed_bytes" in full["metrics"]
+    assert "managed_bytes" not in delta["metrics"]
+    assert "digests_total_since_heartbeat" in delta["metrics"]
+    ws = s.workers[a.address]
+    assert ws.metrics.keys() == full["metrics"].keys()
+
+    # Changed metrics are sent and merged
+    await c.submit(inc, 1)
+    await a.heartbeat()
+    assert calls[-1]["metrics"]["managed_bytes"] == a.state.nbytes > 0
+    assert ws.metrics["managed_bytes"] == a.state.nbytes
+
+
 @pytest.mark.parametrize("worker", [Worker, Nanny])
 def test_worker_dir(worker, tmp_path):
     @gen_cluster(client=True, worker_kwargs={"local_directory": str(tmp_path)})
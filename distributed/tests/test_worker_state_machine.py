@@ -59,6 +59,7 @@ from distributed.worker_state_machine import (
     SecedeEvent,
     StateMachineEvent,
     TaskErredMsg,
+    TaskFinishedMsg,
     TaskState,
     TransitionCounterMaxExceeded,
     UnpauseEvent,
@@ -520,6 +521,47 @@ def test_executesuccess_dummy():
     assert ev2.value == 123
 
 
+def test_task_finished_msg_type(ws):
+    """The serialized output type is reused across tasks returning the same type"""
+    msgs = []
+    for key, value in [("x", 1), ("y", 2), ("z", "3")]:
+        instructions = ws.handle_stimulus(
+            ComputeTaskEvent.dummy(key, stimulus_id=f"compute-{key}"),
+            ExecuteSuccessEvent.dummy(key, value, stimulus_id=f"success-{key}"),
+        )
+        msgs += [inst for inst in instructions if isinstance(inst, TaskFinishedMsg)]
+    assert [msg.key for msg in msgs] == ["x", "y", "z"]
+    assert msgs[0].typename == msgs[1].typename == "int"
+    assert msgs[0].type is msgs[1].type
+    assert pickle.loads(msgs[0].type) is int
+    assert msgs[2].typename == "str"
+    assert pickle.loads(msgs[2].type) is str
+
+
+class UnhashableMeta(type):
+    def __eq__(cls, other):
+        return cls is other
+
+    __hash__ = None  # type: ignore[assignment]
+
+
+class UnhashableType(metaclass=UnhashableMeta):
+    pass
+
+
+def test_task_finished_msg_unhashable_type(ws):
+    """Output types that can't be hashed are serialized without the cache"""
+    with pytest.raises(TypeError):
+        hash(UnhashableType)
+    instructions = ws.handle_stimulus(
+        ComputeTaskEvent.dummy("x", stimulus_id="compute"),
+        ExecuteSuccessEvent.dummy("x", UnhashableType(), stimulus_id="success"),
+    )
+    (msg,) = [inst for inst in instructions if isinstance(inst, TaskFinishedMsg)]
+    assert msg.typename.endswith("UnhashableType")
+    assert pickle.loads(msg.type) is UnhashableType
+
+
 def test_executefailure_to_dict():
     ev = ExecuteFailureEvent(
         stimulus_id="test",
@@ -4,7 +4,13 @@ import asyncio
 import logging
 import random
 from collections import defaultdict
-from collections.abc import Callable, Collection, Coroutine, Mapping
+from collections.abc import (
+    AsyncIterator,
+    Callable,
+    Collection,
+    Coroutine,
+    Mapping,
+)
 from functools import partial
 from itertools import cycle
 from typing import Any, TypeVar
@@ -130,6 +136,121 @@ async def gather_from_workers(
     return data, [], failed_keys, list(missing_workers)
 
 
+async def gather_from_workers_iter(
+    who_has: Mapping[Key, Collection[str]],
+    nbytes: Mapping[Key, int],
+    rpc: ConnectionPool,
+    *,
+    max_in_flight_bytes: int,
+    max_requests_per_worker: int = 2,
+    serializers: list[str] | None = None,
+    who: str | None = None,
+) -> AsyncIterator[tuple[dict[Key, object], list[Key], list[Key], list[str]]]:
+    """Gather data directly from peers in batches, yielding each batch as soon as it
+    arrives
+
+    Keys are split into batches of at most ``max_in_flight_bytes / 4`` bytes held
+    by the same worker, and each batch is collected from that worker with
+    :func:`gather_from_workers`; the other holders of the keys of a batch are only
+    asked for the keys that the worker failed to provide. Batches are requested in
+    parallel, as long as the total size of the batches in flight doesn't exceed
+    ``max_in_flight_bytes`` and no more than ``max_requests_per_worker`` batches are
+    requested from the same worker at once. A batch is no longer in flight once the
+    consumer asks for the next one.
+
+    Parameters
+    ----------
+    who_has:
+        mapping from keys to worker addresses
+    nbytes:
+        mapping from keys to their size, in bytes
+    rpc:
+        RPC channel to use
+
+    Yields
+    ------
+    Same as :func:`gather_from_workers`, for every batch
+    """
+
+    async def gather_batch(
+        address: str, keys: list[Key]
+    ) -> tuple[dict[Key, object], list[Key], list[Key], list[str]]:
+        data, missing_keys, failed_keys, missing_workers = await gather_from_workers(
+            {k: [address] for k in keys}, rpc, serializers=serializers, who=who
+        )
+        fallback = {
+            k: [w for w in who_has[k] if w != address] for k in missing_keys
+        }
+        if any(fallback.values()):
+            more, missing_keys, more_failed, more_missing = await gather_from_workers(
+                fallback, rpc, serializers=serializers, who=who
+            )
+            data.update(more)
+            failed_keys += more_failed
+            missing_workers = list({*missing_workers, *more_missing})
+        return data, missing_keys, failed_keys, missing_workers
+
+    batch_bytes = max(max_in_flight_bytes // 4, 1)
+    by_worker: defaultdict[str, list[list[Key]]] = defaultdict(list)
+    sizes: defaultdict[str, list[int]] = defaultdict(list)
+    no_replicas = []
+    for key, addresses in who_has.items():
+        if not addresses:
+            no_replicas.append(key)
+            continue
+        address = random.choice(list(addresses))
+        batches = by_worker[address]
+        key_nbytes = nbytes.get(key, 0)
+        if not batches or sizes[address][-1] + key_nbytes > batch_bytes:
+            batches.append([])
+            sizes[address].append(0)
+        batches[-1].append(key)
+        sizes[address][-1] += key_nbytes
+    if no_replicas:
+        yield {}, no_replicas, [], []
+
+    pending = {
+        address: list(zip(batches, sizes[address]))
+        for address, batches in by_worker.items()
+    }
+    in_flight: dict[asyncio.Task, tuple[str, int]] = {}
+    in_flight_bytes = 0
+    requests: defaultdict[str, int] = defaultdict(int)
+
+    try:
+        while pending or in_flight:
+            for address in list(pending):
+                batches = pending[address]
+                while (
+                    batches
+                    and requests[address] < max_requests_per_worker
+                    and (
+                        not in_flight
+                        or in_flight_bytes + batches[0][1] <= max_in_flight_bytes
+                    )
+                ):
+                    keys, size = batches.pop(0)
+                    task = asyncio.create_task(
+                        gather_batch(address, keys),
+                        name=f"gather-batch-from-{address}",
+                    )
+                    in_flight[task] = address, size
+                    in_flight_bytes += size
+                    requests[address] += 1
+                if not batches:
+                    del pending[address]
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                address, size = in_flight.pop(task)
+                requests[address] -= 1
+                yield task.result()
+                in_flight_bytes -= size
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
 class WrappedKey:
     """Interface for a key in a dask graph.
 
@@ -184,6 +305,85 @@ async def scatter_to_workers(workers, data, rpc=rpc):
     return (names, who_has, nbytes)
 
 
+async def scatter_to_workers_iter(
+    workers: Collection[str],
+    chunks: AsyncIterator[dict[Key, object]],
+    rpc: ConnectionPool,
+    *,
+    max_requests_per_worker: int = 2,
+    max_in_flight: int | None = None,
+) -> AsyncIterator[tuple[dict[Key, list[str]], dict[Key, int]]]:
+    """Scatter chunks of data directly to workers as they are produced, yielding
+    the location of every chunk as soon as it has been received
+
+    Every chunk is sent in full to the worker with the fewest chunks in flight, so
+    that a slow worker receives less data instead of stalling the others. No more
+    than ``max_requests_per_worker`` chunks are sent to the same worker at once, and
+    no more than ``max_in_flight`` chunks in total; the next chunk is only pulled
+    from ``chunks`` once it can be sent.
+
+    Parameters
+    ----------
+    workers:
+        addresses of the workers to scatter to
+    chunks:
+        mappings from keys to data
+    rpc:
+        RPC channel to use
+
+    Yields
+    ------
+    who_has, nbytes of every chunk
+    """
+    workers = sorted(workers)
+    if not workers:
+        raise ValueError("No workers to scatter to")
+    start = _round_robin_counter[0] % len(workers)
+    _round_robin_counter[0] += 1
+    workers = workers[start:] + workers[:start]
+    capacity = len(workers) * max_requests_per_worker
+    if max_in_flight is not None:
+        capacity = max(min(capacity, max_in_flight), 1)
+
+    requests = dict.fromkeys(workers, 0)
+    sent = dict.fromkeys(workers, 0)
+    in_flight: dict[asyncio.Task, tuple[str, list[Key]]] = {}
+    exhausted = False
+
+    try:
+        while not exhausted or in_flight:
+            while not exhausted and len(in_flight) < capacity:
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                address = min(
+                    (w for w in workers if requests[w] < max_requests_per_worker),
+                    key=lambda w: (requests[w], sent[w]),
+                )
+                task = asyncio.create_task(
+                    rpc(address).update_data(data=chunk),
+                    name=f"scatter-chunk-to-{address}",
+                )
+                in_flight[task] = address, list(chunk)
+                requests[address] += 1
+                sent[address] += 1
+                del chunk
+            if not in_flight:
+                break
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                address, keys = in_flight.pop(task)
+                requests[address] -= 1
+                response = task.result()
+                yield {key: [address] for key in keys}, response["nbytes"]
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+
 collection_types = (tuple, list, set, frozenset)
 
 
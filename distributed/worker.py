@@ -17,6 +17,7 @@ import warnings
 import weakref
 from collections import defaultdict, deque
 from collections.abc import (
+    AsyncIterator,
     Callable,
     Collection,
     Container,
@@ -87,8 +88,13 @@ from distributed.http import get_handlers
 from distributed.metrics import context_meter, thread_time, time
 from distributed.node import ServerNode
 from distributed.proctitle import setproctitle
-from distributed.protocol import pickle, to_serialize
-from distributed.protocol.serialize import _is_dumpable
+from distributed.protocol import Serialized, pickle, to_serialize
+from distributed.protocol.compression import decompress
+from distributed.protocol.serialize import (
+    _is_dumpable,
+    merge_and_deserialize,
+    serialize_and_split,
+)
 from distributed.pubsub import PubSubWorkerExtension
 from distributed.security import Security
 from distributed.sizeof import safe_sizeof as sizeof
@@ -177,6 +183,10 @@ DEFAULT_METRICS: dict[str, Callable[[Worker], Any]] = {}
 
 DEFAULT_STARTUP_INFORMATION: dict[str, Callable[[Worker], Any]] = {}
 
+# Metrics that describe what happened since the previous heartbeat, rather than the
+# current state of the worker; they are sent with every heartbeat.
+_HEARTBEAT_INCREMENTAL_METRICS = {"bandwidth", "digests_total_since_heartbeat"}
+
 WORKER_ANY_RUNNING = {
     Status.running,
     Status.paused,
@@ -458,6 +468,9 @@ class Worker(BaseWorker, ServerNode):
     batched_stream: BatchedSend
     name: Any
     scheduler_delay: float
+    #: Metrics sent with the last heartbeat acknowledged by the scheduler. The next
+    #: heartbeat only sends the metrics that changed since; None to send them all.
+    _acked_heartbeat_metrics: dict | None
     stream_comms: dict[str, BatchedSend]
     heartbeat_interval: float
     services: dict[str, Any] = {}
@@ -652,6 +665,7 @@ class Worker(BaseWorker, ServerNode):
         self.batched_stream = BatchedSend(interval="2ms", loop=self.loop)
         self.name = name
         self.scheduler_delay = 0
+        self._acked_heartbeat_metrics = None
         self.stream_comms = {}
 
         self.plugins = {}
@@ -675,6 +689,8 @@ class Worker(BaseWorker, ServerNode):
 
         handlers = {
             "gather": self.gather,
+            "broadcast": self.broadcast,
+            "broadcast_relay": self.broadcast_relay,
             "run": self.run,
             "run_coroutine": self.run_coroutine,
             "get_data": self.get_data,
@@ -1212,6 +1228,7 @@ class Worker(BaseWorker, ServerNode):
                 middle = (_start + _end) / 2
                 self._update_latency(_end - start)
                 self.scheduler_delay = response["time"] - middle
+                self._acked_heartbeat_metrics = None
                 break
             except OSError:
                 logger.info("Waiting to connect to: %26s", self.scheduler.address)
@@ -1249,11 +1266,28 @@ class Worker(BaseWorker, ServerNode):
         logger.debug("Heartbeat: %s", self.address)
         try:
             start = time()
+            metrics = await self.get_metrics()
+            acked = self._acked_heartbeat_metrics
+            # Reset until the scheduler acknowledges this heartbeat, so that a
+            # lost response is followed by a full heartbeat
+            self._acked_heartbeat_metrics = None
+            if acked is not None and acked.keys() <= metrics.keys():
+                metrics_delta = True
+                sent_metrics = {
+                    k: v
+                    for k, v in metrics.items()
+                    if k in _HEARTBEAT_INCREMENTAL_METRICS or acked.get(k) != v
+                }
+            else:
+                metrics_delta = False
+                sent_metrics = metrics
+
             response = await retry_operation(
                 self.scheduler.heartbeat_worker,
                 address=self.contact_address,
                 now=start,
-                metrics=await self.get_metrics(),
+                metrics=sent_metrics,
+                metrics_delta=metrics_delta,
                 executing={
                     key: start - cast(float, self.state.tasks[key].start_time)
                     for key in self.active_keys
@@ -1284,6 +1318,7 @@ class Worker(BaseWorker, ServerNode):
                 return
 
             self.scheduler_delay = response["time"] - middle
+            self._acked_heartbeat_metrics = metrics
             self.periodic_callbacks["heartbeat"].callback_time = (
                 response["heartbeat-interval"] * 1000
             )
@@ -1348,6 +1383,186 @@ class Worker(BaseWorker, ServerNode):
         else:
             return {"status": "OK"}
 
+    async def broadcast(
+        self,
+        keys: Collection[Key],
+        targets: list[str],
+        branching_factor: int = 2,
+        chunk_size: int = 2**24,
+        stimulus_id: str | None = None,
+    ) -> dict[str, list[Key]]:
+        """Endpoint used by Scheduler.replicate() to copy keys held by this worker
+        to all ``targets``
+
+        The keys are serialized and split into pieces of at most ``chunk_size``
+        bytes, which are streamed to ``branching_factor`` children; each child
+        relays every piece to its own children, see :meth:`broadcast_relay`, as
+        soon as it receives it. So the data flows through a tree of workers in a
+        pipeline, instead of being copied one level of the tree at a time.
+
+        Returns
+        -------
+        The keys that were stored by each target
+        """
+        stimulus_id = stimulus_id or f"broadcast-{time()}"
+
+        async def pieces() -> AsyncIterator[dict[str, Any]]:
+            for key in keys:
+                if key not in self.data:
+                    continue
+                header, frames = await offload(
+                    serialize_and_split,
+                    self.data[key],
+                    on_error="raise",
+                    size=chunk_size,
+                )
+                for i in range(max(len(frames), 1)):
+                    # Only the first piece of every key carries its header
+                    piece = Serialized(header if i == 0 else {}, frames[i : i + 1])
+                    yield {
+                        "op": "piece",
+                        "key": key,
+                        "piece": piece,
+                        "last": i >= len(frames) - 1,
+                    }
+
+        return await self._relay_broadcast(
+            pieces(), targets, branching_factor, stimulus_id, store=False
+        )
+
+    async def broadcast_relay(
+        self,
+        comm: Comm,
+        targets: list[str],
+        branching_factor: int,
+        stimulus_id: str,
+    ) -> dict[str, Any] | Literal[Status.dont_reply]:
+        """Endpoint used by broadcast(): receive the pieces of keys from the parent
+        worker, relay them to the workers of the subtree ``targets`` and store the
+        keys once all of their pieces have arrived
+        """
+
+        async def pieces() -> AsyncIterator[dict[str, Any]]:
+            while (msg := await comm.read())["op"] != "done":
+                yield msg
+
+        # Relay the pieces without deserializing them
+        deserialize = comm.deserialize
+        comm.deserialize = False
+        try:
+            received = await self._relay_broadcast(
+                pieces(), targets, branching_factor, stimulus_id, store=True
+            )
+        except Exception:
+            # Don't let the rest of the stream be mistaken for new requests
+            logger.exception("Failed to relay broadcast from %s", comm.peer_address)
+            comm.abort()
+            return Status.dont_reply
+        finally:
+            comm.deserialize = deserialize
+        return {"status": "OK", "received": received}
+
+    async def _relay_broadcast(
+        self,
+        pieces: AsyncIterator[dict[str, Any]],
+        targets: list[str],
+        branching_factor: int,
+        stimulus_id: str,
+        store: bool,
+    ) -> dict[str, list[Key]]:
+        children: dict[str, Comm] = {}
+        for i in range(min(branching_factor, len(targets))):
+            child, *subtree = targets[i::branching_factor]
+            try:
+                comm = await self.rpc.connect(child)
+                comm.name = "Worker->Worker for broadcast"
+                await comm.write(
+                    {
+                        "op": "broadcast_relay",
+                        "targets": subtree,
+                        "branching_factor": branching_factor,
+                        "stimulus_id": stimulus_id,
+                        "reply": True,
+                    }
+                )
+            except OSError as e:
+                logger.warning(
+                    "Failed to relay broadcast to %s: %s: %s",
+                    child,
+                    e.__class__.__name__,
+                    e,
+                )
+                continue
+            children[child] = comm
+
+        async def send(child: str, msg: dict[str, Any]) -> None:
+            comm = children[child]
+            try:
+                await comm.write(msg)
+            except OSError as e:
+                logger.warning(
+                    "Failed to relay broadcast to %s: %s: %s",
+                    child,
+                    e.__class__.__name__,
+                    e,
+                )
+                comm.abort()
+                del children[child]
+
+        async def recv(child: str) -> dict[str, list[Key]]:
+            comm = children[child]
+            try:
+                response = await comm.read()
+            except OSError as e:
+                logger.warning(
+                    "Failed to relay broadcast to %s: %s: %s",
+                    child,
+                    e.__class__.__name__,
+                    e,
+                )
+                comm.abort()
+                return {}
+            self.rpc.reuse(child, comm)
+            if response.get("status") != "OK":  # pragma: nocover
+                logger.warning("Failed to relay broadcast to %s: %s", child, response)
+                return {}
+            return response["received"]
+
+        received: dict[str, list[Key]] = defaultdict(list)
+        header: dict[str, Any] = {}
+        frames: list = []
+        forwarding = None
+        try:
+            async for msg in pieces:
+                # Relay the previous piece while receiving this one
+                if forwarding is not None:
+                    await forwarding
+                forwarding = asyncio.gather(*(send(c, msg) for c in list(children)))
+                if not store:
+                    continue
+                piece = msg["piece"]
+                if not frames and not header:
+                    header = dict(piece.header)
+                    header.pop("num-sub-frames", None)
+                frames.extend(piece.frames)
+                if msg["last"]:
+                    value = await offload(_merge_broadcast_pieces, header, frames)
+                    header, frames = {}, []
+                    self.update_data({msg["key"]: value}, stimulus_id=stimulus_id)
+                    received[self.address].append(msg["key"])
+                    del value
+            if forwarding is not None:
+                await forwarding
+            await asyncio.gather(*(send(c, {"op": "done"}) for c in list(children)))
+            for response in await asyncio.gather(*(recv(c) for c in list(children))):
+                for address, keys in response.items():
+                    received[address].extend(keys)
+        except BaseException:
+            for comm in children.values():
+                comm.abort()
+            raise
+        return dict(received)
+
     def get_monitor_info(self, recent: bool = False, start: int = 0) -> dict[str, Any]:
         result = dict(
             range_query=(
@@ -2880,6 +3095,13 @@ async def get_data_from_worker(
         rpc.reuse(worker, comm)
 
 
+def _merge_broadcast_pieces(header: dict[str, Any], frames: list) -> object:
+    """Deserialize a key from the pieces received by Worker.broadcast_relay()"""
+    if "compression" in header:
+        frames = decompress(header, frames)
+    return merge_and_deserialize(header, frames)
+
+
 def _normalize_task(task: Any) -> T_runspec:
     if istask(task):
         if task[0] is apply and not any(map(_maybe_complex, task[2:])):
@@ -199,6 +199,32 @@ def _default_data_size() -> int:
     return parse_bytes(dask.config.get("distributed.scheduler.default-data-size"))
 
 
+def _serialize_type(typ: type) -> tuple[bytes, str]:
+    """Pickle the type of the output of a task, and return it together with its name.
+    This is cached, as all tasks of e.g. a Client.map typically return the same type.
+    Types that can't be hashed (e.g. whose metaclass defines ``__eq__`` but not
+    ``__hash__``) are pickled every time.
+    """
+    try:
+        return _serialize_type_cached(typ)
+    except TypeError:
+        return _serialize_type_uncached(typ)
+
+
+@lru_cache(100)
+def _serialize_type_cached(typ: type) -> tuple[bytes, str]:
+    return _serialize_type_uncached(typ)
+
+
+def _serialize_type_uncached(typ: type) -> tuple[bytes, str]:
+    try:
+        return pickle.dumps(typ), typename(typ)
+    except Exception:
+        # Some types fail pickling (example: _thread.lock objects);
+        # send their name as a best effort.
+        return pickle.dumps(typename(typ)), typename(typ)
+
+
 # Note: can't specify __slots__ manually to enable slots in Python <3.10 in a @dataclass
 # that defines any default values
 DC_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
@@ -1779,19 +1805,14 @@ class WorkerState:
             assert ts.type is not None
             assert ts.nbytes is not None
 
-        try:
-            type_serialized = pickle.dumps(ts.type)
-        except Exception:
-            # Some types fail pickling (example: _thread.lock objects);
-            # send their name as a best effort.
-            type_serialized = pickle.dumps(typename(ts.type))
+        type_serialized, type_name = _serialize_type(ts.type)
 
         return TaskFinishedMsg(
             key=ts.key,
             run_id=run_id,
             nbytes=ts.nbytes,
             type=type_serialized,
-            typename=typename(ts.type),
+            typename=type_name,
             metadata=ts.metadata,
             thread=self.threads.get(ts.key),
             startstops=ts.startstops,